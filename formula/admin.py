@@ -8,12 +8,13 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import Group
 from django.core.validators import EMPTY_VALUES
 from django.db import models
-from django.db.models import OuterRef, Q, Sum
+from django.db.models import Count, Q, Sum
 from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
 from django.template.loader import render_to_string
 from django.templatetags.static import static
 from django.urls import path, reverse_lazy
+from django.utils.formats import date_format
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 from django_celery_beat.admin import ClockedScheduleAdmin as BaseClockedScheduleAdmin
@@ -27,7 +28,6 @@ from django_celery_beat.models import (
     PeriodicTask,
     SolarSchedule,
 )
-from djangoql.admin import DjangoQLSearchMixin
 from guardian.admin import GuardedModelAdmin
 from import_export.admin import ExportActionModelAdmin, ImportExportModelAdmin
 from modeltranslation.admin import TabbedTranslationAdmin
@@ -38,20 +38,15 @@ from unfold.admin import (
     StackedInline,
     TabularInline,
 )
-from unfold.components import BaseComponent, register_component
+from unfold.components import register_component
 from unfold.contrib.filters.admin import (
-    AllValuesCheckboxFilter,
     AutocompleteSelectMultipleFilter,
     BooleanRadioFilter,
     CheckboxFilter,
     ChoicesCheckboxFilter,
     RangeDateFilter,
     RangeDateTimeFilter,
-    RangeNumericFilter,
-    RelatedCheckboxFilter,
-    RelatedDropdownFilter,
     SingleNumericFilter,
-    SliderNumericFilter,
     TextFilter,
 )
 from unfold.contrib.forms.widgets import WysiwygWidget
@@ -65,7 +60,6 @@ from unfold.datasets import BaseDataset
 from unfold.decorators import action, display
 from unfold.enums import ActionVariant
 from unfold.forms import AdminPasswordChangeForm, UserChangeForm, UserCreationForm
-from unfold.paginator import InfinitePaginator
 from unfold.sections import TableSection, TemplateSection
 from unfold.widgets import (
     UnfoldAdminCheckboxSelectMultiple,
@@ -76,22 +70,47 @@ from unfold.widgets import (
     UnfoldAdminTextInputWidget,
 )
 
+from formula.changelists import (
+    DriverChangeList,
+    EstimatedCountChangeList,
+    StandingChangeList,
+)
+from formula.components import AggregateComponent, CachedComponent
+from formula.counts import EstimatedCountMixin
+from formula.filters import (
+    CachedAllValuesCheckboxFilter,
+    CachedAllValuesFieldListFilter,
+    CachedRelatedCheckboxFilter,
+    CachedRelatedDropdownFilter,
+    CachedRelatedFieldListFilter,
+    StatisticsRangeNumericFilter,
+    StatisticsSliderNumericFilter,
+)
+from formula.forms import KeysetInlineFormSet
+from formula.loaders import DriverFirstStandingLoader
 from formula.models import (
+    ActivityRollup,
     Circuit,
     Constructor,
     Driver,
     DriverCategory,
+    DriverSearchToken,
     DriverStatus,
     DriverWithFilters,
     PitStop,
     Profile,
     Race,
+    RollupPeriod,
     Standing,
     Tag,
     User,
+    normalize_name,
 )
+from formula.paginator import EstimatedCountPaginator, KeysetPaginator
+from formula.querylang import CachedDjangoQLSearchMixin
 from formula.resources import AnotherConstructorResource, ConstructorResource
-from formula.views import CrispyFormsetView, CrispyFormView
+from formula.search import SearchIndexMixin
+from formula.views import CrispyFormsetView, CrispyFormView, ProfilingView
 
 admin.site.unregister(PeriodicTask)
 admin.site.unregister(IntervalSchedule)
@@ -222,7 +241,7 @@ class ConstructorDataset(BaseDataset):
 
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin, ModelAdmin):
+class UserAdmin(EstimatedCountMixin, BaseUserAdmin, ModelAdmin):
     form = UserChangeForm
     add_form = UserCreationForm
     change_password_form = AdminPasswordChangeForm
@@ -231,7 +250,7 @@ class UserAdmin(BaseUserAdmin, ModelAdmin):
         ("is_staff", BooleanRadioFilter),
         ("is_superuser", BooleanRadioFilter),
         ("is_active", BooleanRadioFilter),
-        ("groups", RelatedCheckboxFilter),
+        ("groups", CachedRelatedCheckboxFilter),
     ]
     list_filter_submit = True
     list_filter_sheet = False
@@ -293,8 +312,21 @@ class UserAdmin(BaseUserAdmin, ModelAdmin):
         }
     }
     readonly_fields = ["last_login", "date_joined"]
+    paginator = EstimatedCountPaginator
     show_full_result_count = False
 
+    def get_changelist(self, request, **kwargs):
+        return EstimatedCountChangeList
+
+    def get_urls(self):
+        return super().get_urls() + [
+            path(
+                "profiling",
+                self.admin_site.admin_view(ProfilingView.as_view(model_admin=self)),
+                name="profiling",
+            ),
+        ]
+
     @display(description=_("User"))
     def display_header(self, instance: User):
         return instance.username
@@ -386,7 +418,7 @@ class CircuitAdmin(ModelAdmin, TabbedTranslationAdmin):
     show_facets = admin.ShowFacets.ALLOW
     search_fields = ["name", "city", "country"]
     list_display = ["name", "city", "country"]
-    list_filter = ["country"]
+    list_filter = [("country", CachedAllValuesFieldListFilter)]
     inlines = [CircuitRaceInline]
     ordering_field = "weight"
     hide_ordering_field = True
@@ -559,9 +591,16 @@ class FullNameFilter(TextFilter):
         if self.value() in EMPTY_VALUES:
             return queryset
 
-        return queryset.filter(
-            Q(first_name__icontains=self.value()) | Q(last_name__icontains=self.value())
-        )
+        # Every term has to be a prefix of a word of the name, range of the
+        # token index matches all words starting with the term
+        for term in normalize_name(self.value()).split():
+            queryset = queryset.filter(
+                pk__in=DriverSearchToken.objects.filter(
+                    token__gte=term, token__lt=f"{term}\uffff"
+                ).values("driver_id")
+            )
+
+        return queryset
 
 
 class DriverStandingInline(TabularInline):
@@ -572,6 +611,7 @@ class DriverStandingInline(TabularInline):
     show_change_link = True
     extra = 0
     per_page = 5
+    formset = KeysetInlineFormSet
     tab = True
 
     def get_queryset(self, request):
@@ -653,13 +693,16 @@ class ChartSection(TemplateSection):
     template_name = "formula/driver_section.html"
 
 
-class DriverAdminMixin(DjangoQLSearchMixin, ModelAdmin):
+class DriverAdminMixin(
+    EstimatedCountMixin, CachedDjangoQLSearchMixin, SearchIndexMixin, ModelAdmin
+):
     list_horizontal_scrollbar_top = True
     list_sections = [ContructorTableSection, ChartSection]
     list_sections_classes = "lg:grid-cols-2"
     form = DriverAdminForm
     history_list_per_page = 10
-    search_fields = ["last_name", "first_name", "code"]
+    paginator = EstimatedCountPaginator
+    search_fields = ["search_name", "code"]
     warn_unsaved_form = True
     compressed_fields = True
     list_display = [
@@ -697,6 +740,7 @@ class DriverAdminMixin(DjangoQLSearchMixin, ModelAdmin):
     ]
     list_before_template = "formula/driver_list_before.html"
     list_after_template = "formula/driver_list_after.html"
+    list_row_loaders = [DriverFirstStandingLoader]
     change_form_show_cancel_button = True
     change_form_before_template = "formula/driver_change_form_before.html"
     change_form_after_template = "formula/driver_change_form_after.html"
@@ -715,27 +759,16 @@ class DriverAdminMixin(DjangoQLSearchMixin, ModelAdmin):
         return (
             super()
             .get_queryset(request)
-            .annotate(total_points=Sum("standing__points"))
-            .annotate(
-                constructor_name=Constructor.objects.filter(
-                    standing__driver_id=OuterRef("pk")
-                ).values("name")[:1]
-            )
-            .prefetch_related(
-                "constructors",
-                "race_set",
-                "race_set__circuit",
-                "standings",
-                "standings__race",
-                "standings__race__circuit",
-            )
+            .select_related("statistics", "statistics__last_constructor")
+            .prefetch_related("constructors")
         )
 
+    def get_changelist(self, request, **kwargs):
+        return DriverChangeList
+
     @display(description=_("Driver"), header=True)
     def display_header(self, instance: Driver) -> list:
-        standing = instance.standings.all().first()
-
-        if not standing:
+        if not instance.first_standing:
             return []
 
         return [
@@ -753,10 +786,12 @@ class DriverAdminMixin(DjangoQLSearchMixin, ModelAdmin):
 
     @display(description=_("Constructor"), dropdown=True)
     def display_constructor(self, instance: Driver):
-        total = instance.constructors.all().count()
+        # Constructors are prefetched for their names, count them as well
+        constructors = instance.constructors.all()
+        total = len(constructors)
         items = []
 
-        for constructor in instance.constructors.all():
+        for constructor in constructors:
             title = format_html(
                 """
                 <div class="flex flex-row gap-2 items-center">
@@ -789,13 +824,15 @@ class DriverAdminMixin(DjangoQLSearchMixin, ModelAdmin):
             # "width": 320,  # Optional
         }
 
-    @display(description=_("Total points"), ordering="total_points")
+    @display(description=_("Total points"), ordering="statistics__total_points")
     def display_total_points(self, instance: Driver):
-        return instance.total_points
+        statistics = getattr(instance, "statistics", None)
+        return statistics.total_points if statistics else 0
 
-    @display(description=_("Total wins"))
+    @display(description=_("Total wins"), ordering="statistics__wins")
     def display_total_wins(self, instance: Driver):
-        return instance.race_set.count()
+        statistics = getattr(instance, "statistics", None)
+        return statistics.wins if statistics else 0
 
     @display(
         description=_("Category"),
@@ -1067,7 +1104,7 @@ class DriverCustomCheckboxFilter(CheckboxFilter):
         return queryset
 
 
-class SalarySliderNumericFilter(SliderNumericFilter):
+class SalarySliderNumericFilter(StatisticsSliderNumericFilter):
     MAX_DECIMALS = 2
 
 
@@ -1077,10 +1114,10 @@ class DriverWithFiltersAdmin(DriverAdminMixin):
     list_filter = [
         FullNameFilter,
         ("constructors", AutocompleteSelectMultipleFilter),
-        ("race__circuit", RelatedDropdownFilter),
+        ("race__circuit", CachedRelatedDropdownFilter),
         ("salary", SalarySliderNumericFilter),
         ("status", ChoicesCheckboxFilter),
-        ("category", AllValuesCheckboxFilter),
+        ("category", CachedAllValuesCheckboxFilter),
         DriverCustomCheckboxFilter,
         ("is_hidden", BooleanRadioFilter),
         ("is_active", BooleanRadioFilter),
@@ -1090,8 +1127,9 @@ class DriverWithFiltersAdmin(DriverAdminMixin):
 
 
 @admin.register(Race)
-class RaceAdmin(ModelAdmin):
+class RaceAdmin(EstimatedCountMixin, SearchIndexMixin, ModelAdmin):
     date_hierarchy = "date"
+    change_list_template = "formula/race_change_list.html"
     search_fields = [
         "circuit__name",
         "circuit__city",
@@ -1100,8 +1138,8 @@ class RaceAdmin(ModelAdmin):
         "winner__last_name",
     ]
     list_filter = [
-        ("circuit", RelatedCheckboxFilter),
-        ("year", RangeNumericFilter),
+        ("circuit", CachedRelatedCheckboxFilter),
+        ("year", StatisticsRangeNumericFilter),
         ("laps", SingleNumericFilter),
         ("date", RangeDateFilter),
         ("created_at", RangeDateTimeFilter),
@@ -1112,10 +1150,14 @@ class RaceAdmin(ModelAdmin):
     list_display = ["circuit", "winner", "year", "laps", "date"]
     list_fullwidth = True
     autocomplete_fields = ["circuit", "winner"]
+    paginator = EstimatedCountPaginator
+
+    def get_changelist(self, request, **kwargs):
+        return EstimatedCountChangeList
 
 
 @admin.register(Standing)
-class StandingAdmin(ModelAdmin):
+class StandingAdmin(SearchIndexMixin, ModelAdmin):
     # list_disable_select_all = True
     search_fields = [
         "race__circuit__name",
@@ -1125,24 +1167,31 @@ class StandingAdmin(ModelAdmin):
         "driver__last_name",
     ]
     list_display = ["race", "driver", "constructor", "position", "points"]
-    list_filter = ["driver"]
+    list_filter = [("driver", CachedRelatedFieldListFilter)]
     autocomplete_fields = ["driver", "constructor", "race"]
     readonly_fields = ["laps"]
-    paginator = InfinitePaginator
+    ordering = ["weight", "id"]
+    paginator = KeysetPaginator
     show_full_result_count = False
     list_disable_select_all = True
     list_per_page = 10
 
+    def get_changelist(self, request, **kwargs):
+        return StandingChangeList
+
 
 @register_component
-class DriverActiveComponent(BaseComponent):
+class DriverActiveComponent(AggregateComponent):
+    aggregate_model = Driver
+    aggregate = Count("pk", filter=Q(status=DriverStatus.ACTIVE))
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
         context["children"] = render_to_string(
             "formula/helpers/kpi_progress.html",
             {
-                "total": Driver.objects.filter(status=DriverStatus.ACTIVE).count(),
+                "total": self.get_cached_value(),
                 "progress": "positive",
                 "percentage": "2.8%",
             },
@@ -1151,14 +1200,17 @@ class DriverActiveComponent(BaseComponent):
 
 
 @register_component
-class DriverInactiveComponent(BaseComponent):
+class DriverInactiveComponent(AggregateComponent):
+    aggregate_model = Driver
+    aggregate = Count("pk", filter=Q(status=DriverStatus.INACTIVE))
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
         context["children"] = render_to_string(
             "formula/helpers/kpi_progress.html",
             {
-                "total": Driver.objects.filter(status=DriverStatus.INACTIVE).count(),
+                "total": self.get_cached_value(),
                 "progress": "negative",
                 "percentage": "-12.8%",
             },
@@ -1167,16 +1219,17 @@ class DriverInactiveComponent(BaseComponent):
 
 
 @register_component
-class DriverTotalPointsComponent(BaseComponent):
+class DriverTotalPointsComponent(AggregateComponent):
+    aggregate_model = Standing
+    aggregate = Sum("points")
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
         context["children"] = render_to_string(
             "formula/helpers/kpi_progress.html",
             {
-                "total": Standing.objects.aggregate(total_points=Sum("points"))[
-                    "total_points"
-                ],
+                "total": self.get_cached_value(),
                 "progress": "positive",
                 "percentage": "24.2%",
             },
@@ -1185,14 +1238,17 @@ class DriverTotalPointsComponent(BaseComponent):
 
 
 @register_component
-class DriverRacesComponent(BaseComponent):
+class DriverRacesComponent(AggregateComponent):
+    aggregate_model = Race
+    aggregate = Count("pk")
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
         context["children"] = render_to_string(
             "formula/helpers/kpi_progress.html",
             {
-                "total": Race.objects.count(),
+                "total": self.get_cached_value(),
                 "progress": "negative",
                 "percentage": "-10.0%",
             },
@@ -1201,33 +1257,37 @@ class DriverRacesComponent(BaseComponent):
 
 
 @register_component
-class DriverSectionChangeComponent(BaseComponent):
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        WEEKDAYS = [
-            "Mon",
-            "Tue",
-            "Wed",
-            "Thu",
-            "Fri",
-            "Sat",
-            "Sun",
-        ]
-        OF_DAYS = 21
+class DriverSectionChangeComponent(CachedComponent):
+    cache_models = [ActivityRollup]
+    weeks = 20
+
+    def get_value(self):
+        rollups = reversed(
+            ActivityRollup.objects.filter(period=RollupPeriod.WEEK).order_by("-date")[
+                : self.weeks
+            ]
+        )
+        labels, points = [], []
 
-        context["data"] = json.dumps(
+        for rollup in rollups:
+            labels.append(date_format(rollup.date, "M j"))
+            points.append(float(rollup.points))
+
+        return json.dumps(
             {
-                "labels": [WEEKDAYS[day % 7] for day in range(1, OF_DAYS)],
+                "labels": labels,
                 "datasets": [
                     {
-                        "data": [
-                            [1, random.randrange(8, OF_DAYS)] for i in range(1, OF_DAYS)
-                        ],
+                        "data": points,
                         "backgroundColor": "var(--color-primary-600)",
                     }
                 ],
             }
         )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["data"] = self.get_cached_value()
         return context
 
 
@@ -0,0 +1,139 @@
+import hashlib
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models.constants import LOOKUP_SEP
+
+from formula.search import (
+    LOOKUP_PREFIXES,
+    SearchIndexMixin,
+    get_search_terms,
+    search_indexes,
+)
+
+AUTOCOMPLETE_TIMEOUT = 60 * 5
+
+
+def get_search_paths(model, search_fields):
+    """
+    Returns attribute paths of searched values and models they are read from.
+    Values of fields in the search index of the model are included as well. When
+    a field is reached through many-to-many or reverse relation, the values can't
+    be read from one row and None is returned.
+    """
+    index = search_indexes.get(model._meta.concrete_model)
+    fields = [*search_fields, *(index.fields if index else [])]
+    paths = {}
+    models = {model}
+
+    for field_name in fields:
+        opts = model._meta
+        path = []
+
+        for part in field_name.lstrip(LOOKUP_PREFIXES).split(LOOKUP_SEP):
+            try:
+                field = opts.get_field(part)
+            except FieldDoesNotExist:
+                # Lookup such as "exact" in "name__exact"
+                break
+
+            if field.is_relation and not (field.many_to_one or field.one_to_one):
+                return None
+
+            if field.is_relation and not field.concrete:
+                return None
+
+            path.append(part)
+
+            if not field.is_relation:
+                break
+
+            opts = field.related_model._meta
+            models.add(field.related_model)
+
+        paths[LOOKUP_SEP.join(path)] = path
+
+    return list(paths.values()), models
+
+
+def get_select_related(paths):
+    """
+    Returns lookups of related objects on search paths, so that reading searched
+    values does not query the database.
+    """
+    return {LOOKUP_SEP.join(path[:i]) for path in paths for i in range(1, len(path))}
+
+
+def get_search_index(model_admin):
+    """
+    Returns search index of the model when the model admin searches through it.
+    Results of such searches are exactly the documents containing all terms,
+    which allows filtering results of a prefix by the documents. Terms without
+    any words return all rows.
+    """
+    if isinstance(model_admin, SearchIndexMixin):
+        return search_indexes.get(model_admin.model._meta.concrete_model)
+
+    return None
+
+
+def get_autocomplete_keys(version, request, term):
+    """
+    Returns cache keys of the term and all its prefixes, longest first. Results
+    depend on the autocompleted field and the user through model admin queryset.
+    """
+    params = (
+        request.GET.get("app_label"),
+        request.GET.get("model_name"),
+        request.GET.get("field_name"),
+        request.user.pk,
+    )
+    term = term.lower()
+    keys = []
+
+    for length in range(len(term), -1, -1):
+        digest = hashlib.sha256(repr((*params, term[:length])).encode()).hexdigest()
+        keys.append(f"formula:autocomplete:{version}:{digest}")
+
+    return keys
+
+
+def get_cached_results(entries, keys, term):
+    """
+    Returns cached results of the term. Otherwise the longest prefix of the term
+    with cached complete results is looked up. When every term of the prefix is
+    part of a term of the search, every match of the search matches the prefix
+    too, so results are filtered by search index documents of the prefix results.
+    """
+    if keys[0] in entries:
+        return entries[keys[0]]
+
+    terms = get_search_terms(term)
+    term = term.lower()
+
+    for i, key in enumerate(keys[1:], start=1):
+        entry = entries.get(key)
+
+        if entry is None or entry["haystacks"] is None:
+            continue
+
+        # Prefix ending inside of a quoted term is searched with the quote
+        prefixes = get_search_terms(term[: len(term) - i])
+
+        if not all(any(prefix in term for term in terms) for prefix in prefixes):
+            continue
+
+        matches = [
+            (result, haystack)
+            for result, haystack in zip(
+                entry["results"], entry["haystacks"], strict=True
+            )
+            if all(term in haystack for term in terms)
+        ]
+
+        return {
+            "results": [result for result, haystack in matches],
+            "haystacks": [haystack for result, haystack in matches],
+            "more": False,
+        }
+
+    return None
@@ -0,0 +1,94 @@
+import hashlib
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import connections
+
+from formula.cache import get_models_version
+
+BADGE_TIMEOUT = 60
+
+
+class BadgeProvider:
+    """
+    Evaluates count queries of all registered badges together. Counts missing in
+    cache are calculated by one query per database and cached for a short time,
+    so the number of badges does not change the number of queries of a page.
+    Model versions are part of cache keys, so counts change on saves right away.
+    """
+
+    def __init__(self):
+        self.badges = []
+
+    def register(self, badge):
+        self.badges.append(badge)
+
+    def get_values(self, request):
+        values = getattr(request, "badge_values", None)
+
+        if values is None:
+            values = request.badge_values = self.evaluate(request)
+
+        return values
+
+    def evaluate(self, request):
+        queries = {}
+
+        for badge in self.badges:
+            queryset = badge.get_queryset(request).order_by().values("pk")
+            sql, params = queryset.query.sql_with_params()
+            # Badges depending on the request, e.g. on the user, compile to
+            # different queries and are cached separately
+            digest = hashlib.sha256(repr((queryset.db, sql, params)).encode())
+            version = get_models_version([queryset.model])
+            queries[badge] = (
+                f"formula:badge:{version}:{digest.hexdigest()}",
+                queryset.db,
+                sql,
+                params,
+            )
+
+        counts = cache.get_many([key for key, db, sql, params in queries.values()])
+        missing = defaultdict(dict)
+
+        for key, db, sql, params in queries.values():
+            if key not in counts:
+                missing[db][key] = (sql, params)
+
+        for db, subqueries in missing.items():
+            counts |= self.count(db, subqueries)
+            cache.set_many({key: counts[key] for key in subqueries}, BADGE_TIMEOUT)
+
+        return {badge: counts[query[0]] for badge, query in queries.items()}
+
+    def count(self, db, subqueries):
+        columns = []
+        params = []
+
+        for i, (sql, subquery_params) in enumerate(subqueries.values()):
+            columns.append(f"(SELECT COUNT(*) FROM ({sql}) AS badge{i})")
+            params += subquery_params
+
+        with connections[db].cursor() as cursor:
+            cursor.execute(f"SELECT {', '.join(columns)}", params)
+            row = cursor.fetchone()
+
+        return dict(zip(subqueries, row, strict=True))
+
+
+badges = BadgeProvider()
+
+
+class CountBadge:
+    """
+    Sidebar badge showing the number of rows returned by `get_queryset(request)`.
+    Instances are referenced by their import path in the "badge" key of
+    navigation items.
+    """
+
+    def __init__(self, get_queryset):
+        self.get_queryset = get_queryset
+        badges.register(self)
+
+    def __call__(self, request):
+        return str(badges.get_values(request)[self])
@@ -0,0 +1,89 @@
+import time
+
+from django.core.cache import cache
+
+STALE_TIMEOUT = 300
+
+LOCK_TIMEOUT = 30
+
+# Database alias holding entries of the database cache backend
+CACHE_DATABASE = "cache"
+
+# App label of the model DatabaseCache uses to query its table
+CACHE_APP_LABEL = "django_cache"
+
+
+def get_version_key(model):
+    return f"formula:version:{model._meta.concrete_model._meta.label_lower}"
+
+
+def get_models_version(models):
+    """
+    Returns a string identifying the current state of the given models. It changes
+    every time one of the models is saved or deleted so it can be part of cache keys.
+    """
+    keys = [get_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+
+    for key in keys:
+        if key not in versions:
+            # Never start from a constant so an evicted version cannot resurrect
+            # entries stored under the same version before
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+
+    return ".".join(str(versions[key]) for key in keys)
+
+
+def bump_model_version(model):
+    try:
+        cache.incr(get_version_key(model))
+    except ValueError:
+        cache.add(get_version_key(model), time.time_ns(), None)
+
+
+def get_or_revalidate(key, callback, timeout, stale_timeout=STALE_TIMEOUT):
+    """
+    Stale-while-revalidate lookup. Expired values are kept for `stale_timeout`
+    seconds and served to everyone except the single caller which acquired the
+    lock and recalculates the value.
+    """
+    entry = cache.get(key)
+
+    if entry is not None:
+        value, expires_at = entry
+
+        if expires_at > time.time() or not cache.add(f"{key}:lock", True, LOCK_TIMEOUT):
+            return value
+
+    value = callback()
+    timeout = timeout() if callable(timeout) else timeout
+    cache.set(key, (value, time.time() + timeout), timeout + stale_timeout)
+    cache.delete(f"{key}:lock")
+
+    return value
+
+
+class CacheRouter:
+    """
+    Routes entries of the database cache into CACHE_DATABASE. Versions and cached
+    values have to be shared by all web workers and management commands, a cache
+    local to the process would not see invalidations made by the others. The
+    separate database keeps cache writes away from locks of application data.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == CACHE_APP_LABEL:
+            return CACHE_DATABASE
+
+        return None
+
+    def db_for_write(self, model, **hints):
+        return self.db_for_read(model, **hints)
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Only `createcachetable --database cache` creates tables there
+        if app_label == CACHE_APP_LABEL:
+            return db == CACHE_DATABASE
+
+        return db != CACHE_DATABASE
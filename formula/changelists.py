@@ -0,0 +1,89 @@
+from django.contrib.admin.views.main import IS_FACETS_VAR
+from djangoql.admin import DjangoQLChangeList
+from unfold.views import ChangeList
+
+from formula.counts import EXACT_COUNT_VAR, is_count_estimated
+from formula.paginator import CURSOR_VAR, EstimatedCountPaginator, KeysetPaginator
+
+
+class RowDataChangeListMixin:
+    def get_results(self, request):
+        super().get_results(request)
+
+        for loader_class in self.model_admin.list_row_loaders:
+            loader_class(request).load(self.result_list)
+
+
+class KeysetChangeListMixin:
+    """
+    Reads the page of KeysetPaginator from the cursor parameter. The cursor is
+    never carried over to other links, changing filters or sorting starts from
+    the first page.
+    """
+
+    keyset_page = None
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        return super().get_query_string(new_params, [*(remove or []), CURSOR_VAR])
+
+    def get_results(self, request):
+        super().get_results(request)
+
+        if isinstance(self.paginator, KeysetPaginator) and self.paginator.keyset:
+            self.keyset_page = self.paginator.page_for_cursor(
+                request.GET.get(CURSOR_VAR)
+            )
+            self.result_list = self.keyset_page.object_list
+
+
+class EstimatedCountChangeListMixin:
+    """
+    Facet counts scan the whole list once per filter, so on lists estimated to
+    be large they are calculated only when counting exactly. Showing facets
+    counts the list exactly as well.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(EXACT_COUNT_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        super().get_results(request)
+
+        self.exact_count_link = self.get_query_string({EXACT_COUNT_VAR: 1})
+        self.add_facet_link = self.get_query_string(
+            {IS_FACETS_VAR: True, EXACT_COUNT_VAR: 1}
+        )
+        self.remove_facet_link = self.get_query_string(
+            remove=[IS_FACETS_VAR, EXACT_COUNT_VAR]
+        )
+
+        if not self.add_facets or EXACT_COUNT_VAR in request.GET:
+            return
+
+        if isinstance(self.paginator, EstimatedCountPaginator):
+            self.add_facets = not self.paginator.estimated
+        else:
+            self.add_facets = not is_count_estimated(self.queryset)
+
+
+class DriverChangeList(
+    RowDataChangeListMixin, EstimatedCountChangeListMixin, DjangoQLChangeList
+):
+    pass
+
+
+class StandingChangeList(
+    KeysetChangeListMixin, EstimatedCountChangeListMixin, ChangeList
+):
+    pass
+
+
+class EstimatedCountChangeList(EstimatedCountChangeListMixin, ChangeList):
+    pass
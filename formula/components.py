@@ -0,0 +1,103 @@
+from collections import defaultdict
+from types import SimpleNamespace
+
+from constance import config
+from django.utils.translation import get_language
+from unfold.components import BaseComponent, ComponentRegistry
+
+from formula.cache import get_models_version, get_or_revalidate
+
+
+class CachedComponent(BaseComponent):
+    """
+    Component calculating its value through `get_value`. The value is cached for
+    `cache_ttl` seconds (`SITE_CACHE_TTL` by default) and invalidated as soon as
+    one of `cache_models` is saved or deleted. Values are cached per language.
+    """
+
+    cache_models = []
+    cache_ttl = None
+
+    def get_cache_ttl(self):
+        if self.cache_ttl is not None:
+            return self.cache_ttl
+
+        if self.request is None:
+            return config.SITE_CACHE_TTL
+
+        # Every constance lookup is a database query, read it once per request
+        if not hasattr(self.request, "site_cache_ttl"):
+            self.request.site_cache_ttl = config.SITE_CACHE_TTL
+
+        return self.request.site_cache_ttl
+
+    def get_cache_key(self):
+        return (
+            f"formula:component:{self.__class__.__name__}:{get_language()}:"
+            f"{get_models_version(self.cache_models)}"
+        )
+
+    def get_value(self):
+        raise NotImplementedError(
+            "Cached components must implement the get_value method."
+        )
+
+    def get_cached_value(self):
+        return get_or_revalidate(
+            self.get_cache_key(), self.get_value, self.get_cache_ttl
+        )
+
+
+class AggregateComponent(CachedComponent):
+    """
+    Component displaying a single `aggregate` expression over `aggregate_model`.
+    Expressions of all registered aggregate components are evaluated together, see
+    `get_component_aggregates`.
+    """
+
+    aggregate_model = None
+    aggregate = None
+
+    def get_cached_value(self):
+        return get_component_aggregates(self.request)[self.__class__.__name__]
+
+
+def get_component_aggregates(request):
+    """
+    Resolves aggregates of every registered AggregateComponent with one conditional
+    aggregation query per model. Results are cached per model and memoized on the
+    request so the remaining components on the page do not query anything.
+    """
+    if request is None:
+        request = SimpleNamespace()
+
+    if hasattr(request, "component_aggregates"):
+        return request.component_aggregates
+
+    components = defaultdict(list)
+
+    for component_class in ComponentRegistry._registry.values():
+        if issubclass(component_class, AggregateComponent):
+            components[component_class.aggregate_model].append(component_class(request))
+
+    request.component_aggregates = {}
+
+    for model, model_components in components.items():
+        names = sorted(component.__class__.__name__ for component in model_components)
+        expressions = {
+            component.__class__.__name__: component.aggregate
+            for component in model_components
+        }
+
+        request.component_aggregates.update(
+            get_or_revalidate(
+                f"formula:aggregates:{model._meta.label_lower}:{','.join(names)}:"
+                f"{get_models_version([model])}",
+                lambda model=model, expressions=expressions: model.objects.aggregate(
+                    **expressions
+                ),
+                min(component.get_cache_ttl() for component in model_components),
+            )
+        )
+
+    return request.component_aggregates
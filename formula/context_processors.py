@@ -2,9 +2,15 @@ from os import environ
 
 from django.conf import settings
 
+from formula.exceptions import ReadonlyException
+
+# Resolved once, readonly mode does not change while the process is running
+READONLY_BANNER = ReadonlyException.message if settings.READONLY else None
+
 
 def variables(request):
     return {
         "plausible_domain": settings.PLAUSIBLE_DOMAIN,
+        "readonly": READONLY_BANNER,
         "studio_installed": environ.get("UNFOLD_STUDIO") == "1",
     }
@@ -0,0 +1,140 @@
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import DatabaseError, connections
+
+from formula.cache import get_models_version
+
+# Lists with more rows than estimated are not counted exactly on page load
+ESTIMATED_COUNT_THRESHOLD = 10_000
+
+ESTIMATE_TIMEOUT = 60 * 5
+
+EXACT_COUNT_VAR = "exact"
+
+MISSING = object()
+
+
+def estimate_count(queryset):
+    """
+    Returns the estimated number of rows, None when the database can't estimate
+    the query. Estimates are cached per model version, so page loads do not ask
+    the planner every time.
+    """
+    queryset = queryset.order_by()
+
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        # E.g. `queryset.none()` returned for invalid searches
+        return 0
+
+    digest = hashlib.sha256(repr((queryset.db, sql, params)).encode())
+    version = get_models_version([queryset.model])
+    key = f"formula:count:{version}:{digest.hexdigest()}"
+    estimate = cache.get(key, MISSING)
+
+    if estimate is MISSING:
+        estimate = query_estimate(queryset, sql, params)
+        cache.set(key, estimate, ESTIMATE_TIMEOUT)
+
+    return estimate
+
+
+def query_estimate(queryset, sql, params):
+    """
+    Asks the query planner of PostgreSQL or reads table statistics of SQLite
+    collected by ANALYZE. SQLite statistics describe whole tables, so only
+    unfiltered querysets are estimated there.
+    """
+    connection = connections[queryset.db]
+    query = queryset.query
+
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        return plan[0]["Plan"]["Plan Rows"]
+
+    if connection.vendor == "sqlite":
+        if query.where or query.distinct or query.group_by or query.combinator:
+            return None
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT stat FROM sqlite_stat1 WHERE tbl = %s",
+                    [queryset.model._meta.db_table],
+                )
+                stats = cursor.fetchall()
+        except DatabaseError:
+            # Statistics table exists only after the first ANALYZE
+            return None
+
+        if stats:
+            return max(int(stat.split()[0]) for (stat,) in stats)
+
+    return None
+
+
+def count_rows(model):
+    """
+    Returns the estimated number of rows in the table of the model. When the
+    database can't estimate it, the table is counted and the count is cached per
+    model version same as estimates.
+    """
+    estimate = estimate_count(model._default_manager.order_by())
+
+    if estimate is not None:
+        return estimate
+
+    version = get_models_version([model])
+    key = f"formula:rows:{version}:{model._meta.label_lower}"
+    count = cache.get(key)
+
+    if count is None:
+        count = model._default_manager.count()
+        cache.set(key, count, ESTIMATE_TIMEOUT)
+
+    return count
+
+
+def get_count(queryset, exact=False):
+    """
+    Returns the number of rows and whether it is an estimate. Estimates are used
+    only above ESTIMATED_COUNT_THRESHOLD, smaller lists are counted exactly.
+    """
+    if not exact:
+        estimate = estimate_count(queryset)
+
+        if estimate is not None and estimate > ESTIMATED_COUNT_THRESHOLD:
+            return estimate, True
+
+    return queryset.count(), False
+
+
+def is_count_estimated(queryset):
+    estimate = estimate_count(queryset)
+    return estimate is not None and estimate > ESTIMATED_COUNT_THRESHOLD
+
+
+class EstimatedCountMixin:
+    """
+    Model admin mixin letting paginators and facet filters count exactly only
+    when the EXACT_COUNT_VAR parameter is present. Expects a changelist class
+    based on EstimatedCountChangeListMixin. The unfiltered total is not shown,
+    counting it would scan the whole table on every page load.
+    """
+
+    show_full_result_count = False
+
+    def get_paginator(self, request, *args, **kwargs):
+        paginator = super().get_paginator(request, *args, **kwargs)
+        paginator.exact = EXACT_COUNT_VAR in request.GET
+        return paginator
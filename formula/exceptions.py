@@ -1,2 +1,40 @@
+from django.utils.translation import gettext_lazy as _
+from djangoql.exceptions import DjangoQLError
+
+
 class ReadonlyException(Exception):
-    pass
+    """
+    Raised when data are modified while the database is in readonly mode. `code`
+    tells which guard rejected the write.
+    """
+
+    code = "readonly"
+    message = _(
+        "Database is operating in readonly mode. Not possible to save any data."
+    )
+
+    def __init__(self, message=None, code=None):
+        if message is not None:
+            self.message = message
+
+        if code is not None:
+            self.code = code
+
+        super().__init__(self.message)
+
+
+class QueryCostException(DjangoQLError):
+    """
+    Raised when a DjangoQL search is expected to scan more rows than allowed.
+    Being a DjangoQLError, it is reported the same way as syntax errors.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        super().__init__(
+            _(
+                "Search would scan about %(rows)s rows through related records. "
+                "Narrow it down with conditions on fewer relations."
+            )
+            % {"rows": rows}
+        )
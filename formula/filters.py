@@ -0,0 +1,291 @@
+import hashlib
+from collections import Counter
+
+from django.contrib import admin
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, FloatField
+from django.utils.translation import get_language
+from unfold.contrib.filters.admin import (
+    AllValuesCheckboxFilter,
+    RangeNumericFilter,
+    RelatedCheckboxFilter,
+    RelatedDropdownFilter,
+    SliderNumericFilter,
+)
+from unfold.contrib.filters.forms import RangeNumericForm
+
+from formula.cache import get_models_version
+from formula.models import Circuit, Driver, FieldStatistics, Race
+
+FILTER_CHOICES_TIMEOUT = 60 * 60
+
+
+class ValueChoices:
+    """
+    Distinct values of a model field with the number of rows holding each value,
+    cached per language under the version of the model. Any save, delete or bulk
+    change of the model groups the table again on the next read.
+    """
+
+    def __init__(self, model, field_name):
+        self.model = model
+        self.field_name = field_name
+
+    def get_key(self, language):
+        label = self.model._meta.label_lower
+        version = get_models_version([self.model])
+        return f"formula:choices:{label}:{self.field_name}:{language}:{version}"
+
+    def get_counts(self):
+        key = self.get_key(get_language())
+        counts = cache.get(key)
+
+        if counts is None:
+            counts = self.count()
+            cache.set(key, counts, FILTER_CHOICES_TIMEOUT)
+
+        return counts
+
+    def get(self):
+        # Same order as `order_by(field_name)` of AllValuesFieldListFilter
+        return sorted(self.get_counts(), key=lambda value: (value is not None, value))
+
+    def count(self):
+        return Counter(
+            dict(
+                self.model._default_manager.order_by()
+                .values_list(self.field_name)
+                .annotate(count=Count("pk"))
+            )
+        )
+
+
+class CalendarIndex(ValueChoices):
+    """
+    Number of rows per date of a date field for the date hierarchy. Years, months
+    and days with their counts are summed up from the cached dates, so no level
+    of the drill-down queries the table. Dates do not depend on the language.
+    """
+
+    def get_key(self, language=None):
+        label = self.model._meta.label_lower
+        version = get_models_version([self.model])
+        return f"formula:calendar:{label}:{self.field_name}:{version}"
+
+    def get_years(self):
+        return self.sum_by(lambda date: date.year)
+
+    def get_months(self, year):
+        return self.sum_by(lambda date: date.month, year=year)
+
+    def get_days(self, year, month):
+        return self.sum_by(lambda date: date.day, year=year, month=month)
+
+    def sum_by(self, part, **lookups):
+        counts = Counter()
+
+        for date, count in self.get_counts().items():
+            if date is None:
+                continue
+
+            if all(getattr(date, name) == value for name, value in lookups.items()):
+                counts[part(date)] += count
+
+        return sorted(counts.items())
+
+
+value_choices = {
+    Circuit: [ValueChoices(Circuit, "country")],
+    Driver: [ValueChoices(Driver, "category")],
+    Race: [CalendarIndex(Race, "date")],
+}
+
+
+# Fields with bounds and histogram kept in FieldStatistics
+field_statistics = {
+    Driver: ["salary"],
+    Race: ["year"],
+}
+
+
+def get_value_choices(model, field_path):
+    for choices in value_choices.get(model._meta.concrete_model, []):
+        if choices.field_name == field_path:
+            return choices
+
+    return None
+
+
+def get_calendar_index(model, field_path):
+    choices = get_value_choices(model, field_path)
+    return choices if isinstance(choices, CalendarIndex) else None
+
+
+def get_related_choices(field, ordering):
+    """
+    Returns choices of the related model cached under its version, so that any
+    save of the related model refreshes them. Related tables are small compared
+    to the filtered ones, loading them again is cheap.
+    """
+    params = (field.model._meta.label_lower, field.name, repr(ordering))
+    digest = hashlib.sha256(repr(params).encode()).hexdigest()
+    version = get_models_version([field.related_model])
+    key = f"formula:choices:{version}:{get_language()}:{digest}"
+    choices = cache.get(key)
+
+    if choices is None:
+        choices = field.get_choices(include_blank=False, ordering=ordering)
+        cache.set(key, choices, FILTER_CHOICES_TIMEOUT)
+
+    return choices
+
+
+class CachedValueChoicesMixin:
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+
+        # Lookup choices of AllValuesFieldListFilter are a lazy queryset
+        if choices := get_value_choices(model, field_path):
+            self.lookup_choices = choices.get()
+
+
+class CachedRelatedChoicesMixin:
+    def field_choices(self, field, request, model_admin):
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        return get_related_choices(field, ordering)
+
+
+class CachedAllValuesFieldListFilter(
+    CachedValueChoicesMixin, admin.AllValuesFieldListFilter
+):
+    pass
+
+
+class CachedAllValuesCheckboxFilter(CachedValueChoicesMixin, AllValuesCheckboxFilter):
+    pass
+
+
+class CachedRelatedFieldListFilter(
+    CachedRelatedChoicesMixin, admin.RelatedFieldListFilter
+):
+    pass
+
+
+class CachedRelatedCheckboxFilter(CachedRelatedChoicesMixin, RelatedCheckboxFilter):
+    pass
+
+
+class CachedRelatedDropdownFilter(CachedRelatedChoicesMixin, RelatedDropdownFilter):
+    pass
+
+
+class StatisticsMixin:
+    """
+    Reads bounds and histogram of the field from FieldStatistics instead of
+    aggregating the whole column on every changelist load.
+    """
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.model = model
+
+    def get_statistics(self):
+        return FieldStatistics.objects.get_statistics(self.model, self.field_path)
+
+    def get_histogram(self, statistics):
+        highest = max(statistics.histogram, default=0)
+
+        return [
+            {
+                "from": start,
+                "to": end,
+                "count": count,
+                "height": round(count * 100 / highest) if highest else 0,
+            }
+            for start, end, count in statistics.get_buckets()
+        ]
+
+    def to_value(self, value):
+        if value is None or isinstance(self.field, FloatField | DecimalField):
+            return value
+
+        return round(value)
+
+
+class StatisticsRangeNumericFilter(StatisticsMixin, RangeNumericFilter):
+    template = "formula/filters/numeric_range.html"
+
+    def choices(self, changelist):
+        statistics = self.get_statistics()
+        min_value = self.to_value(statistics.min_value)
+        max_value = self.to_value(statistics.max_value)
+
+        return (
+            {
+                "request": self.request,
+                "parameter_name": self.parameter_name,
+                "min": min_value,
+                "max": max_value,
+                "histogram": self.get_histogram(statistics),
+                "form": RangeNumericForm(
+                    name=self.parameter_name,
+                    min=min_value,
+                    max=max_value,
+                    data={
+                        self.parameter_name + "_from": self.used_parameters.get(
+                            self.parameter_name + "_from", None
+                        ),
+                        self.parameter_name + "_to": self.used_parameters.get(
+                            self.parameter_name + "_to", None
+                        ),
+                    },
+                ),
+            },
+        )
+
+
+class StatisticsSliderNumericFilter(StatisticsMixin, SliderNumericFilter):
+    template = "formula/filters/numeric_slider.html"
+
+    def choices(self, changelist):
+        statistics = self.get_statistics()
+        min_value = self.to_value(statistics.min_value)
+
+        # Slider needs two different values, same as in SliderNumericFilter
+        if statistics.count > 1:
+            max_value = self.to_value(statistics.max_value)
+        else:
+            max_value = None
+
+        if isinstance(self.field, FloatField | DecimalField):
+            decimals = self.MAX_DECIMALS
+            step = self.STEP if self.STEP else self._get_min_step(self.MAX_DECIMALS)
+        else:
+            decimals = 0
+            step = self.STEP if self.STEP else 1
+
+        value_from = self.used_parameters.get(self.parameter_name + "_from", min_value)
+        value_to = self.used_parameters.get(self.parameter_name + "_to", max_value)
+
+        return (
+            {
+                "decimals": decimals,
+                "step": step,
+                "parameter_name": self.parameter_name,
+                "request": self.request,
+                "min": min_value,
+                "max": max_value,
+                "value_from": value_from,
+                "value_to": value_to,
+                "histogram": self.get_histogram(statistics),
+                "form": self.form_class(
+                    name=self.parameter_name,
+                    min=min_value,
+                    max=max_value,
+                    data={
+                        self.parameter_name + "_from": value_from,
+                        self.parameter_name + "_to": value_to,
+                    },
+                ),
+            },
+        )
@@ -3,9 +3,10 @@ from crispy_forms.layout import Column, Div, Fieldset, Layout, Row
 from django import forms
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
 from django.utils.translation import gettext_lazy as _
 from django.views.generic import RedirectView
-from unfold.forms import AuthenticationForm
+from unfold.forms import AuthenticationForm, PaginationInlineFormSet
 from unfold.layout import Submit
 from unfold.widgets import (
     UnfoldAdminCheckboxSelectMultiple,
@@ -29,6 +30,7 @@ from unfold.widgets import (
 )
 
 from formula.models import Driver
+from formula.paginator import KeysetPaginator
 
 
 class HomeView(RedirectView):
@@ -348,6 +350,43 @@ class DriverFormSet(forms.BaseModelFormSet):
         raise ValidationError("Testing formset wide error messages.")
 
 
+class KeysetInlineFormSet(PaginationInlineFormSet):
+    """
+    Inline formset paginated by KeysetPaginator. The page is identified by the
+    cursor parameter instead of its number, so paging does not count the rows
+    and deep pages are read without OFFSET.
+    """
+
+    paginator = None
+
+    def __init__(self, request=None, per_page=None, *args, **kwargs):
+        super().__init__(request, None, *args, **kwargs)
+        self.per_page = per_page
+
+        if not self.per_page:
+            return
+
+        self.paginator = KeysetPaginator(self.queryset, self.per_page)
+
+        if self.paginator.keyset is None:
+            self.paginator = Paginator(self.queryset, self.per_page)
+            self.page = self.get_page(self.paginator, self.get_page_num())
+        else:
+            self.page = self.paginator.page_for_cursor(self.get_cursor())
+
+        self._queryset = self.page.object_list
+
+    def get_pagination_key(self):
+        if isinstance(self.paginator, KeysetPaginator):
+            return f"{self.prefix}-cursor"
+
+        return super().get_pagination_key()
+
+    def get_cursor(self):
+        key = self.get_pagination_key()
+        return self.request.GET.get(key) or self.request.POST.get(key)
+
+
 class LoginForm(AuthenticationForm):
     password = forms.CharField(widget=forms.PasswordInput(render_value=True))
 
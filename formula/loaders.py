@@ -0,0 +1,37 @@
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from formula.models import Standing
+
+
+class RowDataLoader:
+    """
+    Fetches data needed by changelist columns for all rows on the current page at
+    once so display callbacks do not have to query the database row by row.
+    """
+
+    def __init__(self, request):
+        self.request = request
+
+    def load(self, objects):
+        raise NotImplementedError("Row data loaders must implement the load method.")
+
+
+class DriverFirstStandingLoader(RowDataLoader):
+    def load(self, objects):
+        drivers = {driver.pk: driver for driver in objects}
+        standings = (
+            Standing.objects.filter(driver_id__in=drivers.keys())
+            .annotate(
+                row_number=Window(
+                    RowNumber(),
+                    partition_by=F("driver_id"),
+                    order_by=[F("weight").asc(), F("pk").asc()],
+                )
+            )
+            .filter(row_number=1)
+        )
+        first_standings = {standing.driver_id: standing for standing in standings}
+
+        for driver_id, driver in drivers.items():
+            driver.first_standing = first_standings.get(driver_id)
@@ -0,0 +1,208 @@
+import json
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from formula.models import User
+
+BUDGETS = Path(apps.get_app_config("formula").path) / "benchmarks.json"
+
+METRICS = ["queries", "time", "sql_time", "memory"]
+
+# Multipliers applied to measured values when budgets are updated. Query counts
+# are deterministic, timings and memory depend on the machine.
+HEADROOM = {"queries": 1, "time": 3, "sql_time": 3, "memory": 1.5}
+
+# Lower bounds of budgets so that fast pages do not fail on timer noise
+FLOOR = {"queries": 0, "time": 50, "sql_time": 10, "memory": 1024}
+
+
+class QueryTimer:
+    """
+    Database execute wrapper counting queries and the time spent in them.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.time = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.time += time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        "Renders the dashboard and changelist, add and change views of registered "
+        "model admins and compares wall time (ms), SQL queries, SQL time (ms) and "
+        "peak memory (KiB) against committed budgets."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "app_labels",
+            nargs="*",
+            default=["formula"],
+            help="Only benchmark model admins of these applications.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of measured requests per page, the median is reported.",
+        )
+        parser.add_argument("--budgets", default=BUDGETS, type=Path)
+        parser.add_argument(
+            "--update-budgets",
+            action="store_true",
+            help="Write current measurements with headroom as new budgets.",
+        )
+        parser.add_argument(
+            "--username", help="Superuser used for requests, defaults to the first."
+        )
+
+    def handle(self, *args, **options):
+        client = self.get_client(options["username"])
+        budgets = {}
+
+        if options["budgets"].exists():
+            budgets = json.loads(options["budgets"].read_text())
+
+        results = {}
+        exceeded = []
+
+        # Recording of sampled profiles would add queries to random requests
+        with override_settings(
+            ALLOWED_HOSTS=["testserver", *settings.ALLOWED_HOSTS],
+            PROFILING_SAMPLE_RATE=0,
+        ):
+            for name, url in self.get_pages(options["app_labels"]):
+                results[name] = self.measure(client, url, options["repeat"])
+                budget = budgets.get(name)
+                line = ", ".join(
+                    f"{metric} {results[name][metric]}"
+                    + (f"/{budget[metric]}" if budget else "")
+                    for metric in METRICS
+                )
+
+                if budget is None:
+                    self.stdout.write(self.style.WARNING(f"NEW   {name}: {line}"))
+                elif over := [m for m in METRICS if results[name][m] > budget[m]]:
+                    exceeded.append(f"{name} ({', '.join(over)})")
+                    self.stdout.write(self.style.ERROR(f"OVER  {name}: {line}"))
+                else:
+                    self.stdout.write(f"OK    {name}: {line}")
+
+        if options["update_budgets"]:
+            budgets.update(
+                {
+                    name: {
+                        metric: round(max(value * HEADROOM[metric], FLOOR[metric]), 1)
+                        for metric, value in result.items()
+                    }
+                    for name, result in results.items()
+                }
+            )
+            options["budgets"].write_text(
+                json.dumps(budgets, indent=2, sort_keys=True) + "\n"
+            )
+            self.stdout.write(f"Budgets written to {options['budgets']}.")
+        elif exceeded:
+            raise CommandError(f"Budgets exceeded: {'; '.join(exceeded)}")
+
+    def get_client(self, username):
+        users = User.objects.filter(is_superuser=True, is_active=True)
+        user = users.filter(username=username) if username else users.order_by("pk")
+
+        if (user := user.first()) is None:
+            raise CommandError("Superuser is required to render admin pages.")
+
+        # Session is built by hand, login() would update last_login which is not
+        # possible in readonly mode
+        client = Client()
+        session = client.session
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+
+        return client
+
+    def get_pages(self, app_labels):
+        pages = [("dashboard", reverse("admin:index"))]
+
+        for model in admin.site._registry:
+            opts = model._meta
+
+            if opts.app_label not in app_labels:
+                continue
+
+            info = f"admin:{opts.app_label}_{opts.model_name}"
+            obj = model._default_manager.order_by("pk").first()
+            pages += [
+                (f"{opts.label_lower} changelist", reverse(f"{info}_changelist")),
+                (f"{opts.label_lower} add", reverse(f"{info}_add")),
+            ]
+
+            if obj is not None:
+                pages.append(
+                    (
+                        f"{opts.label_lower} change",
+                        reverse(f"{info}_change", args=[obj.pk]),
+                    )
+                )
+
+        return pages
+
+    def measure(self, client, url, repeat):
+        # First request fills caches and compiles templates
+        self.request(client, url)
+        timings = []
+
+        for _i in range(repeat):
+            timer = QueryTimer()
+
+            with connection.execute_wrapper(timer):
+                started = time.perf_counter()
+                self.request(client, url)
+                timings.append((time.perf_counter() - started, timer))
+
+        # Tracing allocations slows the request down, memory is measured separately
+        tracemalloc.start()
+        self.request(client, url)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        return {
+            "queries": max(timer.queries for elapsed, timer in timings),
+            "time": round(statistics.median(t for t, timer in timings) * 1000, 1),
+            "sql_time": round(
+                statistics.median(timer.time for t, timer in timings) * 1000, 1
+            ),
+            "memory": round(peak / 1024, 1),
+        }
+
+    def request(self, client, url):
+        response = client.get(url)
+
+        if response.status_code != 200:
+            raise CommandError(f"{url} returned {response.status_code}.")
+
+        return response
@@ -0,0 +1,177 @@
+from django.contrib import admin
+from django.contrib.admin import ListFilter
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models
+from django.forms.models import _get_foreign_key
+from unfold.contrib.filters.admin import (
+    RangeDateFilter,
+    RangeDateTimeFilter,
+)
+from unfold.contrib.filters.admin.mixins import RangeNumericMixin
+from unfold.contrib.inlines.admin import NonrelatedInlineMixin
+
+RANGE_FILTERS = (RangeNumericMixin, RangeDateFilter, RangeDateTimeFilter)
+
+
+def get_index_prefixes(model):
+    opts = model._meta.concrete_model._meta
+    prefixes = [[field.column] for field in opts.concrete_fields if field.db_index]
+    prefixes += [[field.column] for field in opts.concrete_fields if field.unique]
+    prefixes += [
+        [opts.get_field(name).column for name in fields]
+        for fields in opts.unique_together
+    ]
+
+    for index in [*opts.indexes, *opts.constraints]:
+        if getattr(index, "fields", None) and not getattr(index, "condition", None):
+            prefixes.append(
+                [opts.get_field(name.lstrip("-")).column for name in index.fields]
+            )
+
+    return prefixes
+
+
+def get_ordering_column(model, ordering):
+    if not ordering or not isinstance(ordering[0], str):
+        return None
+
+    try:
+        field = model._meta.get_field(ordering[0].lstrip("-"))
+    except FieldDoesNotExist:
+        return None
+
+    # Secondary indexes reference rows by primary key so ordering by it is free
+    if field.primary_key:
+        return None
+
+    return field.column
+
+
+def get_filter_field(model, list_filter):
+    if isinstance(list_filter, tuple | list):
+        field_path, filter_class = list_filter
+    elif isinstance(list_filter, type) and issubclass(list_filter, ListFilter):
+        return None, None
+    else:
+        field_path, filter_class = list_filter, None
+
+    try:
+        field = model._meta.get_field(field_path)
+    except FieldDoesNotExist:
+        return None, None
+
+    # Joins, many to many relations and low cardinality booleans are not served
+    # by an index on the changelist table
+    if (
+        not field.concrete
+        or field.many_to_many
+        or isinstance(field, models.BooleanField)
+    ):
+        return None, None
+
+    return field, filter_class
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports list filter, ordering, date hierarchy and inline access paths of "
+        "registered model admins which are not supported by any database index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "app_labels",
+            nargs="*",
+            default=["formula"],
+            help="Only check model admins of these applications.",
+        )
+
+    def handle(self, *args, **options):
+        app_labels = options["app_labels"]
+        access_paths = []
+
+        for model, model_admin in admin.site._registry.items():
+            if model._meta.app_label not in app_labels:
+                continue
+
+            access_paths += self.get_changelist_paths(model, model_admin)
+            access_paths += self.get_inline_paths(model, model_admin.inlines)
+
+        missing = 0
+
+        for name, model, columns in sorted(
+            {(name, model, tuple(columns)) for name, model, columns in access_paths},
+            key=lambda path: (path[0], path[2]),
+        ):
+            supported = any(
+                tuple(prefix[: len(columns)]) == columns
+                for prefix in get_index_prefixes(model)
+            )
+            description = f"{name}: {model._meta.db_table} ({', '.join(columns)})"
+
+            if supported:
+                self.stdout.write(f"OK       {description}")
+            else:
+                missing += 1
+                self.stdout.write(self.style.ERROR(f"MISSING  {description}"))
+
+        if missing:
+            raise CommandError(f"{missing} access paths have no supporting index.")
+
+    def get_changelist_paths(self, model, model_admin):
+        name = model_admin.__class__.__name__
+        ordering = get_ordering_column(
+            model, model_admin.ordering or model._meta.ordering
+        )
+        paths = []
+
+        if ordering:
+            paths.append((name, model, [ordering]))
+
+        if model_admin.date_hierarchy:
+            field = model._meta.get_field(model_admin.date_hierarchy)
+            paths.append((name, model, [field.column]))
+
+        for list_filter in model_admin.list_filter:
+            field, filter_class = get_filter_field(model, list_filter)
+
+            if field is None:
+                continue
+
+            # Range lookups can only use the index for filtering, not for sorting
+            if ordering and not (
+                filter_class and issubclass(filter_class, RANGE_FILTERS)
+            ):
+                paths.append((name, model, [field.column, ordering]))
+            else:
+                paths.append((name, model, [field.column]))
+
+        return paths
+
+    def get_inline_paths(self, parent_model, inlines):
+        paths = []
+
+        for inline in inlines:
+            if issubclass(inline, NonrelatedInlineMixin):
+                continue
+
+            name = inline.__name__
+            model = inline.model
+
+            if hasattr(inline, "ct_field"):
+                columns = [
+                    model._meta.get_field(inline.ct_field).column,
+                    model._meta.get_field(inline.ct_fk_field).column,
+                ]
+            else:
+                fk = _get_foreign_key(parent_model, model, fk_name=inline.fk_name)
+                columns = [fk.column]
+
+            ordering = get_ordering_column(
+                model, inline.ordering or model._meta.ordering
+            )
+            paths.append((name, model, columns + [ordering] if ordering else columns))
+            paths += self.get_inline_paths(model, getattr(inline, "inlines", []))
+
+        return paths
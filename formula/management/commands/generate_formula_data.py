@@ -0,0 +1,226 @@
+import random
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from formula.cache import bump_model_version
+from formula.models import (
+    Circuit,
+    Constructor,
+    Driver,
+    DriverStatistics,
+    PitStop,
+    Race,
+    Standing,
+)
+
+POINTS = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1]
+
+RACES_PER_SEASON = 22
+
+DRIVERS_PER_RACE = 20
+
+# Share of drivers not finishing the race
+RETIREMENT_RATE = 0.08
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates synthetic seasons of races with standings and pit stops for load "
+        "testing. Output is deterministic for the same seed and existing drivers, "
+        "circuits and constructors (load fixtures first)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--races",
+            type=int,
+            default=10000,
+            help="Number of races to generate, every race has 20 standings.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=250,
+            help="Number of races written in one transaction.",
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.circuits = list(
+            Circuit.objects.order_by("pk").values_list("pk", flat=True)
+        )
+        self.constructors = list(
+            Constructor.objects.order_by("pk").values_list("pk", flat=True)
+        )
+        self.drivers = list(Driver.objects.order_by("pk").values_list("pk", flat=True))
+
+        if not self.circuits or not self.constructors:
+            raise CommandError("Circuits and constructors are required, load fixtures.")
+
+        if len(self.drivers) < DRIVERS_PER_RACE:
+            raise CommandError(f"At least {DRIVERS_PER_RACE} drivers are required.")
+
+        last_race = Race.objects.order_by("-date").values_list("date", "weight").first()
+        # Every circuit keeps the same race distance across seasons
+        self.laps = {circuit: self.random.randint(44, 78) for circuit in self.circuits}
+        self.year = (last_race[0].year if last_race else date.today().year) + 1
+        self.weight = last_race[1] + 1 if last_race else 0
+        self.season = []
+
+        started = time.perf_counter()
+        counts = {Race: 0, Standing: 0, PitStop: 0}
+
+        for offset in range(0, options["races"], options["batch_size"]):
+            size = min(options["batch_size"], options["races"] - offset)
+
+            for model, count in self.write_batch(size).items():
+                counts[model] += count
+
+            rows = sum(counts.values())
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{counts[Race]} races, {rows} rows ({rows / elapsed:.0f} rows/s)"
+            )
+
+        for model in counts:
+            bump_model_version(model)
+
+        DriverStatistics.objects.refresh(*self.drivers)
+        call_command("rebuild_search_index", stdout=self.stdout)
+        call_command("rebuild_field_statistics", stdout=self.stdout)
+        call_command("rollup_activity", rebuild=True, stdout=self.stdout)
+
+        # Refreshed statistics are the source of estimated changelist counts
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        generated = ", ".join(
+            f"{count} {model._meta.verbose_name_plural}"
+            for model, count in counts.items()
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {generated} in {time.perf_counter() - started:.2f}s."
+            )
+        )
+
+    def get_season(self):
+        """
+        Returns the next race weekend, starting new season with shuffled calendar,
+        grid of drivers and their constructors once the previous one is over.
+        """
+        if not self.season:
+            grid = self.random.sample(self.drivers, DRIVERS_PER_RACE)
+            constructors = self.random.sample(
+                self.constructors, min(len(self.constructors), DRIVERS_PER_RACE // 2)
+            )
+            self.grid = {
+                driver: constructors[i % len(constructors)]
+                for i, driver in enumerate(grid)
+            }
+            self.numbers = {driver: i + 1 for i, driver in enumerate(grid)}
+            # Constructor ratings make results of the same teams correlated
+            self.ratings = {
+                constructor: self.random.gauss(0, 1) for constructor in constructors
+            }
+
+            # Races are held on Sundays from March to November
+            start = date(self.year, 3, 1)
+            start += timedelta(days=(6 - start.weekday()) % 7)
+            calendar = self.random.choices(self.circuits, k=RACES_PER_SEASON)
+            self.season = [
+                (circuit, start + timedelta(weeks=round(i * 38 / RACES_PER_SEASON)))
+                for i, circuit in enumerate(calendar)
+            ]
+            self.year += 1
+
+        return self.season.pop(0)
+
+    def write_batch(self, size):
+        races = []
+        results = []
+
+        for _i in range(size):
+            circuit, race_date = self.get_season()
+            order = sorted(
+                self.grid,
+                key=lambda driver: self.random.gauss(
+                    -self.ratings[self.grid[driver]], 1
+                ),
+            )
+
+            races.append(
+                Race(
+                    circuit_id=circuit,
+                    winner_id=order[0],
+                    year=race_date.year,
+                    laps=self.laps[circuit],
+                    date=race_date,
+                    weight=self.weight,
+                )
+            )
+            results.append((order, self.grid, self.numbers))
+            self.weight += 1
+
+        standings = []
+        pit_stops = []
+
+        with transaction.atomic():
+            Race.objects.bulk_create(races)
+
+            for race, (order, grid, numbers) in zip(races, results, strict=True):
+                for position, driver in enumerate(order, start=1):
+                    completed = race.laps
+
+                    if self.random.random() < RETIREMENT_RATE:
+                        completed = self.random.randint(1, race.laps - 1)
+
+                    standings.append(
+                        Standing(
+                            race_id=race.pk,
+                            driver_id=driver,
+                            constructor_id=grid[driver],
+                            position=position,
+                            number=numbers[driver],
+                            laps=completed,
+                            points=Decimal(
+                                POINTS[position - 1] if position <= len(POINTS) else 0
+                            ),
+                            weight=position,
+                        )
+                    )
+                    pit_stops += self.get_pit_stops(race, driver, completed)
+
+            Standing.objects.bulk_create(standings, batch_size=1000)
+            PitStop.objects.bulk_create(pit_stops, batch_size=1000)
+
+        return {Race: len(races), Standing: len(standings), PitStop: len(pit_stops)}
+
+    def get_pit_stops(self, race, driver, completed):
+        # Most races are one or two stop races, stops are spread over the distance
+        stops = self.random.choices([0, 1, 2, 3], weights=[2, 45, 43, 10])[0]
+        laps = sorted(
+            self.random.sample(range(2, race.laps), min(stops, race.laps - 2))
+        )
+        start = datetime.combine(race.date, datetime.min.time()).replace(hour=15)
+
+        return [
+            PitStop(
+                race_id=race.pk,
+                driver_id=driver,
+                lap=lap,
+                time=(start + timedelta(seconds=lap * 92)).time(),
+                duration=(
+                    datetime.min
+                    + timedelta(seconds=max(1.8, self.random.gauss(2.6, 0.6)))
+                ).time(),
+            )
+            for lap in laps
+            if lap <= completed
+        ]
@@ -0,0 +1,244 @@
+import json
+import re
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+
+from django.apps import apps
+from django.core import serializers
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from formula.cache import bump_model_version
+from formula.models import Driver, DriverStatistics
+
+CHUNK_SIZE = 64 * 1024
+
+# Whitespace and punctuation of the top level array between fixture objects
+SEPARATORS = re.compile(r"[\s\[\],]*")
+
+
+def iter_fixture_objects(path):
+    """
+    Yields objects of a JSON fixture one by one while reading the file in chunks,
+    so the whole array is never held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+
+    with open(path, encoding="utf-8") as file:
+        for chunk in iter(partial(file.read, CHUNK_SIZE), ""):
+            buffer += chunk
+            position = 0
+
+            while True:
+                position = SEPARATORS.match(buffer, position).end()
+
+                try:
+                    obj, position = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    break
+
+                yield obj
+
+            buffer = buffer[position:]
+
+    if buffer.strip():
+        raise CommandError(f"Fixture {path} is not a valid JSON array.")
+
+
+@contextmanager
+def preserve_timestamps(models):
+    """
+    bulk_create fills auto_now fields with the current time, keep fixture values.
+    """
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    flags = [(field, field.auto_now, field.auto_now_add) for field in fields]
+
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in flags:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Loads Formula fixtures into an empty database. Fixtures are stream-parsed, "
+        "foreign keys validated before writing and rows inserted in batches inside "
+        "one transaction. Derived data (statistics, search index, rollups) are "
+        "rebuilt afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "fixtures",
+            nargs="*",
+            help="Fixture files to load, defaults to all formula fixtures.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows inserted by one query.",
+        )
+
+    def handle(self, *args, **options):
+        paths = options["fixtures"] or sorted(
+            (Path(apps.get_app_config("formula").path) / "fixtures").glob("*.json")
+        )
+        started = time.perf_counter()
+
+        # First pass only collects primary keys so references between fixture
+        # files can be validated regardless of the order of files
+        pks = defaultdict(set)
+
+        for path in paths:
+            for obj in iter_fixture_objects(path):
+                pks[apps.get_model(obj["model"])].add(obj["pk"])
+
+        models = list(pks)
+        counts = defaultdict(int)
+
+        with (
+            preserve_timestamps(models),
+            transaction.atomic(),
+            connection.constraint_checks_disabled(),
+        ):
+            for path in paths:
+                batch = []
+
+                for obj in iter_fixture_objects(path):
+                    batch.append(obj)
+
+                    if len(batch) >= options["batch_size"]:
+                        self.write_batch(batch, pks, counts, options["batch_size"])
+                        batch = []
+
+                self.write_batch(batch, pks, counts, options["batch_size"])
+
+            connection.check_constraints(
+                table_names=[model._meta.db_table for model in models]
+            )
+
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                    cursor.execute(sql)
+
+        loaded = time.perf_counter() - started
+        rows = sum(counts.values())
+
+        for model, count in counts.items():
+            if count:
+                self.stdout.write(f"{model._meta.label}: {count} rows")
+
+        self.stdout.write(
+            f"Loaded {rows} rows in {loaded:.2f}s ({rows / max(loaded, 1e-6):.0f} rows/s)."
+        )
+
+        for model in models:
+            bump_model_version(model)
+
+        DriverStatistics.objects.refresh(*Driver.objects.values_list("pk", flat=True))
+        call_command("rebuild_search_index", stdout=self.stdout)
+        call_command("rebuild_field_statistics", stdout=self.stdout)
+        call_command("rollup_activity", rebuild=True, stdout=self.stdout)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Finished in {time.perf_counter() - started:.2f}s including "
+                "derived data."
+            )
+        )
+
+    def write_batch(self, batch, pks, counts, batch_size):
+        instances = defaultdict(list)
+        relations = defaultdict(list)
+
+        for deserialized in serializers.deserialize("python", batch):
+            instance = deserialized.object
+            model = instance.__class__
+            self.validate_references(instance, deserialized.m2m_data, pks)
+
+            if isinstance(instance, Driver):
+                instance.search_name = instance.get_search_name()
+
+            instances[model].append(instance)
+
+            for name, values in deserialized.m2m_data.items():
+                field = model._meta.get_field(name)
+                through = field.remote_field.through
+                relations[through] += [
+                    through(
+                        **{
+                            field.m2m_column_name(): instance.pk,
+                            field.m2m_reverse_name(): value,
+                        }
+                    )
+                    for value in values
+                ]
+
+        # Rows with the same primary key are overwritten like loaddata does, e.g.
+        # the anonymous user created by guardian after migrations
+        for model, objs in instances.items():
+            model._base_manager.bulk_create(
+                objs,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=[model._meta.pk.name],
+                update_fields=[
+                    field.name
+                    for field in model._meta.concrete_fields
+                    if not field.primary_key
+                ],
+            )
+            counts[model] += len(objs)
+
+        for model, objs in relations.items():
+            model._base_manager.bulk_create(
+                objs, batch_size=batch_size, ignore_conflicts=True
+            )
+            counts[model] += len(objs)
+
+    def validate_references(self, instance, m2m_data, pks):
+        opts = instance._meta
+        references = [
+            (field, getattr(instance, field.attname))
+            for field in opts.concrete_fields
+            if field.is_relation
+        ]
+        references += [
+            (opts.get_field(name), value)
+            for name, values in m2m_data.items()
+            for value in values
+        ]
+
+        for field, value in references:
+            if value is None:
+                continue
+
+            related_model = field.related_model._meta.concrete_model
+
+            if related_model not in pks:
+                # Model not part of the fixtures, compare against existing rows
+                pks[related_model] = set(
+                    related_model._base_manager.values_list("pk", flat=True)
+                )
+
+            if value not in pks[related_model]:
+                raise CommandError(
+                    f"{opts.label} {instance.pk}: {field.name} references missing "
+                    f"{related_model._meta.label} {value}."
+                )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from formula.filters import field_statistics
+from formula.models import FieldStatistics
+
+
+class Command(BaseCommand):
+    help = "Rebuilds bounds and histograms of fields used by numeric filters."
+
+    def handle(self, *args, **options):
+        for model, fields in field_statistics.items():
+            for field_name in fields:
+                statistics = FieldStatistics.objects.rebuild(model, field_name)
+                self.stdout.write(f"Rebuilt statistics of {statistics}")
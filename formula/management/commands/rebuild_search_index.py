@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from formula.models import DriverSearchToken
+from formula.search import search_indexes
+
+
+class Command(BaseCommand):
+    help = "Rebuilds search documents of all models with a search index."
+
+    def handle(self, *args, **options):
+        for model, index in search_indexes.items():
+            index.rebuild()
+            self.stdout.write(f"Rebuilt {index.table} for {model._meta.label}")
+
+        DriverSearchToken.objects.rebuild()
+        self.stdout.write(f"Rebuilt {DriverSearchToken._meta.db_table}")
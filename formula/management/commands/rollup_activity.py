@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from formula.cache import bump_model_version
+from formula.models import ActivityRollup, Race, get_week_start
+
+
+class Command(BaseCommand):
+    help = (
+        "Aggregates standings into daily and weekly activity rollups. Only weeks "
+        "containing races or standings changed since the previous run are "
+        "recalculated, use --rebuild after deleting data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Recalculate all rollups instead of changed weeks only.",
+        )
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            weeks = None
+        else:
+            watermark = ActivityRollup.objects.get_watermark()
+            races = Race.objects.all()
+
+            if watermark:
+                races = races.filter(
+                    Q(modified_at__gte=watermark)
+                    | Q(standing__modified_at__gte=watermark)
+                )
+
+            weeks = {
+                get_week_start(date) for date in races.values_list("date", flat=True)
+            }
+
+            if not weeks:
+                self.stdout.write("Activity rollups are up to date.")
+                return
+
+        count = ActivityRollup.objects.rollup(weeks)
+
+        # Shared cache delivers the new version to all web workers
+        bump_model_version(ActivityRollup)
+
+        if weeks is None:
+            message = f"Recalculated all weeks ({count} rollups)."
+        else:
+            message = f"Recalculated {len(weeks)} weeks ({count} rollups)."
+
+        self.stdout.write(self.style.SUCCESS(message))
@@ -1,27 +1,157 @@
-from django.contrib import messages
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib import admin, messages
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
-from django.utils.translation import gettext_lazy as _
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from formula.exceptions import ReadonlyException
+from formula.profiling import (
+    Profile,
+    current_profile,
+    instrument_display_callbacks,
+    record_profile,
+)
+
+
+class AsyncWhiteNoiseMiddleware:
+    """
+    Serves static files by WhiteNoise in ASGI mode. WhiteNoise middleware is
+    synchronous only, so requests of static files are passed to it in a thread
+    while other requests continue without leaving the event loop.
+    """
+
+    sync_capable = False
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Files not found are left to the rest of the middleware chain
+        self.whitenoise = WhiteNoiseMiddleware(lambda request: None)
+        markcoroutinefunction(self)
+
+    async def __call__(self, request):
+        if request.path_info.startswith(self.whitenoise.static_prefix):
+            response = await sync_to_async(self.whitenoise)(request)
+
+            if response is not None:
+                return response
+
+        return await self.get_response(request)
 
 
 class ReadonlyExceptionHandlerMiddleware:
+    """
+    Turns writes rejected in readonly mode into a warning message and redirect.
+    Works for both WSGI and ASGI requests.
+    """
+
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
 
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
     def __call__(self, request):
-        response = self.get_response(request)
-        return response
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
 
     def process_exception(self, request, exception):
-        if (
-            exception
-            and repr(exception)
-            == "ReadonlyException('Database is operating in readonly mode. Not possible to save any data.')"
-        ):
-            messages.warning(
-                request,
-                _(
-                    "Database is operating in readonly mode. Not possible to save any data."
-                ),
-            )
+        if isinstance(exception, ReadonlyException):
+            messages.warning(request, exception.message)
             return redirect(request.headers.get("referer", reverse_lazy("admin:login")))
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a sample of admin requests (PROFILING_SAMPLE_RATE) and records query
+    counts, duplicate queries, SQL and template render time and time spent in
+    display callbacks. Results are sent to staff in Server-Timing header.
+    Works for both WSGI and ASGI requests.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument_display_callbacks(admin.site)
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        profile = Profile()
+        token = current_profile.set(profile)
+
+        try:
+            response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+
+        return self.finish(profile, request.user, response)
+
+    async def __acall__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return await self.get_response(request)
+
+        profile = Profile()
+        token = current_profile.set(profile)
+
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_profile.reset(token)
+
+        # Recording of the profile queries the database
+        return await sync_to_async(self.finish)(
+            profile, await request.auser(), response
+        )
+
+    def finish(self, profile, user, response):
+        if profile.view is None:
+            return response
+
+        profile.finish()
+        record_profile(profile)
+
+        if user.is_staff:
+            response.headers["Server-Timing"] = profile.get_server_timing()
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = current_profile.get()
+
+        if profile is not None and request.resolver_match.app_name == "admin":
+            profile.view = request.resolver_match.view_name
+
+    def process_template_response(self, request, response):
+        profile = current_profile.get()
+
+        if profile is not None and profile.view is not None:
+            started = time.perf_counter()
+
+            def finish_render(response):
+                profile.render_time += time.perf_counter() - started
+
+            response.add_post_render_callback(finish_render)
+
+        return response
@@ -0,0 +1,54 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_driver_statistics(apps, schema_editor):
+    Driver = apps.get_model("formula", "Driver")
+    DriverStatistics = apps.get_model("formula", "DriverStatistics")
+    Race = apps.get_model("formula", "Race")
+    Standing = apps.get_model("formula", "Standing")
+
+    for driver_id in Driver.objects.values_list("pk", flat=True):
+        standings = Standing.objects.filter(driver_id=driver_id)
+        aggregates = standings.aggregate(
+            total_points=models.Sum("points"),
+            podiums=models.Count("pk", filter=models.Q(position__lte=3)),
+        )
+
+        DriverStatistics.objects.create(
+            driver_id=driver_id,
+            total_points=aggregates["total_points"] or 0,
+            podiums=aggregates["podiums"],
+            wins=Race.objects.filter(winner_id=driver_id).count(),
+            last_constructor_id=standings.order_by("-race__date", "-pk")
+            .values_list("constructor_id", flat=True)
+            .first(),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('formula', '0027_alter_circuit_options_alter_constructor_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriverStatistics',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('modified_at', models.DateTimeField(auto_now=True, verbose_name='modified at')),
+                ('driver', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistics', serialize=False, to='formula.driver', verbose_name='driver')),
+                ('total_points', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='total points')),
+                ('wins', models.PositiveIntegerField(default=0, verbose_name='wins')),
+                ('podiums', models.PositiveIntegerField(default=0, verbose_name='podiums')),
+                ('last_constructor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='formula.constructor', verbose_name='last constructor')),
+            ],
+            options={
+                'verbose_name': 'driver statistics',
+                'verbose_name_plural': 'driver statistics',
+                'db_table': 'driver_statistics',
+            },
+        ),
+        migrations.RunPython(populate_driver_statistics, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('formula', '0028_driverstatistics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('DAY', 'Day'), ('WEEK', 'Week')], max_length=255, verbose_name='period')),
+                ('date', models.DateField(verbose_name='date')),
+                ('races', models.PositiveIntegerField(default=0, verbose_name='races')),
+                ('standings', models.PositiveIntegerField(default=0, verbose_name='standings')),
+                ('points', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='points')),
+                ('computed_at', models.DateTimeField(verbose_name='computed at')),
+            ],
+            options={
+                'verbose_name': 'activity rollup',
+                'verbose_name_plural': 'activity rollups',
+                'db_table': 'activity_rollups',
+                'constraints': [models.UniqueConstraint(fields=('period', 'date'), name='activity_rollups_period_date')],
+            },
+        ),
+    ]
@@ -0,0 +1,83 @@
+from django.db import migrations
+
+# Searched fields of the changelists, including translations of circuit names
+SEARCH_INDEXES = {
+    "Driver": ["last_name", "first_name", "code"],
+    "Race": [
+        "circuit__name",
+        "circuit__name_de",
+        "circuit__name_en",
+        "circuit__city",
+        "circuit__country",
+        "winner__first_name",
+        "winner__last_name",
+    ],
+    "Standing": [
+        "race__circuit__name",
+        "race__circuit__name_de",
+        "race__circuit__name_en",
+        "race__circuit__city",
+        "race__circuit__country",
+        "driver__first_name",
+        "driver__last_name",
+    ],
+}
+
+
+def get_search_table(apps, model_name):
+    return f"{apps.get_model('formula', model_name)._meta.db_table}_search"
+
+
+def create_search_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    id_column = "rowid" if connection.vendor == "sqlite" else "id"
+
+    for model_name, fields in SEARCH_INDEXES.items():
+        table = get_search_table(apps, model_name)
+        quoted_table = schema_editor.quote_name(table)
+
+        if connection.vendor == "sqlite":
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {quoted_table} USING fts5(body, tokenize='trigram')"
+            )
+        else:
+            schema_editor.execute(
+                f"CREATE TABLE {quoted_table} (id bigint PRIMARY KEY, body text NOT NULL)"
+            )
+
+        if connection.vendor == "postgresql":
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            schema_editor.execute(
+                f"CREATE INDEX {schema_editor.quote_name(table + '_body')} "
+                f"ON {quoted_table} USING gin (body gin_trgm_ops)"
+            )
+
+        rows = apps.get_model("formula", model_name).objects.values_list("pk", *fields)
+        documents = [
+            (pk, " ".join(str(value) for value in values if value).lower())
+            for pk, *values in rows.iterator()
+        ]
+
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {quoted_table} ({id_column}, body) VALUES (%s, %s)",
+                documents,
+            )
+
+
+def delete_search_indexes(apps, schema_editor):
+    for model_name in SEARCH_INDEXES:
+        schema_editor.execute(
+            f"DROP TABLE {schema_editor.quote_name(get_search_table(apps, model_name))}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('formula', '0030_admin_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, delete_search_indexes),
+    ]
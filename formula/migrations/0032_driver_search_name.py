@@ -0,0 +1,118 @@
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Searched fields of the changelists, drivers are searched by the new search name
+SEARCH_INDEXES = {
+    "Driver": ["search_name", "code"],
+    "Race": [
+        "circuit__name",
+        "circuit__name_de",
+        "circuit__name_en",
+        "circuit__city",
+        "circuit__country",
+        "winner__first_name",
+        "winner__last_name",
+    ],
+    "Standing": [
+        "race__circuit__name",
+        "race__circuit__name_de",
+        "race__circuit__name_en",
+        "race__circuit__city",
+        "race__circuit__country",
+        "driver__first_name",
+        "driver__last_name",
+    ],
+}
+
+
+def normalize_name(value):
+    value = unicodedata.normalize("NFKD", value or "")
+    value = "".join(char for char in value if not unicodedata.combining(char))
+    return " ".join(value.lower().split())
+
+
+def populate_search_name(apps, schema_editor):
+    Driver = apps.get_model("formula", "Driver")
+    drivers = list(Driver.objects.only("first_name", "last_name"))
+
+    for driver in drivers:
+        driver.search_name = normalize_name(f"{driver.first_name} {driver.last_name}")
+
+    Driver.objects.bulk_update(drivers, ["search_name"], batch_size=1000)
+
+
+def populate_search_tokens(apps, schema_editor):
+    Driver = apps.get_model("formula", "Driver")
+    DriverSearchToken = apps.get_model("formula", "DriverSearchToken")
+    tokens = [
+        DriverSearchToken(driver_id=driver_id, token=token)
+        for driver_id, search_name in Driver.objects.values_list("pk", "search_name")
+        for token in set(search_name.split())
+    ]
+
+    DriverSearchToken.objects.bulk_create(tokens, batch_size=1000)
+
+
+def rebuild_search_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    id_column = "rowid" if connection.vendor == "sqlite" else "id"
+
+    # Documents are normalized the same way as search names now
+    for model_name, fields in SEARCH_INDEXES.items():
+        model = apps.get_model("formula", model_name)
+        table = schema_editor.quote_name(f"{model._meta.db_table}_search")
+        documents = [
+            (pk, normalize_name(" ".join(str(value) for value in values if value)))
+            for pk, *values in model.objects.values_list("pk", *fields).iterator()
+        ]
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.executemany(
+                f"INSERT INTO {table} ({id_column}, body) VALUES (%s, %s)",
+                documents,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('formula', '0031_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='driver',
+            name='search_name',
+            field=models.CharField(default='', editable=False, max_length=511, verbose_name='search name'),
+        ),
+        migrations.AddField(
+            model_name='historicaldriver',
+            name='search_name',
+            field=models.CharField(default='', editable=False, max_length=511, verbose_name='search name'),
+        ),
+        migrations.AddField(
+            model_name='historicaldriverwithfilters',
+            name='search_name',
+            field=models.CharField(default='', editable=False, max_length=511, verbose_name='search name'),
+        ),
+        migrations.CreateModel(
+            name='DriverSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=255, verbose_name='token')),
+                ('driver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='formula.driver', verbose_name='driver')),
+            ],
+            options={
+                'verbose_name': 'driver search token',
+                'verbose_name_plural': 'driver search tokens',
+                'db_table': 'driver_search_tokens',
+                'constraints': [models.UniqueConstraint(fields=('token', 'driver'), name='driver_search_tokens_token_driver')],
+            },
+        ),
+        migrations.RunPython(populate_search_name, migrations.RunPython.noop),
+        migrations.RunPython(populate_search_tokens, migrations.RunPython.noop),
+        migrations.RunPython(rebuild_search_indexes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('formula', '0032_driver_search_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ViewProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('view', models.CharField(max_length=255, unique=True, verbose_name='view')),
+                ('requests', models.PositiveIntegerField(default=0, verbose_name='requests')),
+                ('time', models.FloatField(default=0, verbose_name='time')),
+                ('queries', models.PositiveIntegerField(default=0, verbose_name='queries')),
+                ('max_queries', models.PositiveIntegerField(default=0, verbose_name='max queries')),
+                ('duplicates', models.PositiveIntegerField(default=0, verbose_name='duplicates')),
+                ('sql_time', models.FloatField(default=0, verbose_name='SQL time')),
+                ('render_time', models.FloatField(default=0, verbose_name='render time')),
+            ],
+            options={
+                'verbose_name': 'view profile',
+                'verbose_name_plural': 'view profiles',
+                'db_table': 'view_profiles',
+            },
+        ),
+        migrations.CreateModel(
+            name='ViewProfileCallback',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='name')),
+                ('time', models.FloatField(default=0, verbose_name='time')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='callbacks', to='formula.viewprofile', verbose_name='profile')),
+            ],
+            options={
+                'verbose_name': 'view profile callback',
+                'verbose_name_plural': 'view profile callbacks',
+                'db_table': 'view_profile_callbacks',
+                'constraints': [models.UniqueConstraint(fields=('profile', 'name'), name='view_profile_callbacks_profile_name')],
+            },
+        ),
+    ]
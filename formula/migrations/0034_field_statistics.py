@@ -0,0 +1,106 @@
+from django.db import migrations, models
+
+# Histogrammed fields and bucket count of the filters at the time of this migration
+FIELD_STATISTICS = {
+    "Driver": ["salary"],
+    "Race": ["year"],
+}
+
+HISTOGRAM_BUCKETS = 20
+
+
+def build_field_statistics(apps, schema_editor):
+    # Filters read statistics without building missing ones
+    FieldStatistics = apps.get_model("formula", "FieldStatistics")
+
+    for model_name, fields in FIELD_STATISTICS.items():
+        model = apps.get_model("formula", model_name)
+
+        for field_name in fields:
+            queryset = model.objects.filter(
+                **{f"{field_name}__isnull": False}
+            ).order_by()
+            aggregates = queryset.aggregate(
+                count=models.Count("pk"),
+                min=models.Min(field_name),
+                max=models.Max(field_name),
+            )
+            histogram = [0] * HISTOGRAM_BUCKETS
+            start = size = None
+
+            if aggregates["count"]:
+                start = float(aggregates["min"])
+                size = (float(aggregates["max"]) - start) / HISTOGRAM_BUCKETS or 1
+
+                for value in queryset.values_list(field_name, flat=True).iterator():
+                    bucket = int((float(value) - start) // size)
+                    histogram[min(bucket, HISTOGRAM_BUCKETS - 1)] += 1
+
+            FieldStatistics.objects.create(
+                model=model._meta.label_lower,
+                field=field_name,
+                count=aggregates["count"],
+                min_value=aggregates["min"],
+                max_value=aggregates["max"],
+                histogram_start=start,
+                histogram_size=size,
+                histogram=histogram,
+            )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("formula", "0033_view_profiles"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FieldStatistics",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model", models.CharField(max_length=255, verbose_name="model")),
+                ("field", models.CharField(max_length=255, verbose_name="field")),
+                ("count", models.PositiveIntegerField(default=0, verbose_name="count")),
+                (
+                    "min_value",
+                    models.FloatField(blank=True, null=True, verbose_name="min value"),
+                ),
+                (
+                    "max_value",
+                    models.FloatField(blank=True, null=True, verbose_name="max value"),
+                ),
+                (
+                    "histogram_start",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="histogram start"
+                    ),
+                ),
+                (
+                    "histogram_size",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="histogram size"
+                    ),
+                ),
+                ("histogram", models.JSONField(default=list, verbose_name="histogram")),
+            ],
+            options={
+                "verbose_name": "field statistics",
+                "verbose_name_plural": "field statistics",
+                "db_table": "field_statistics",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("model", "field"), name="field_statistics_model_field"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(build_field_statistics, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,27 @@
+import unicodedata
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
 from django.contrib.auth.models import AbstractUser
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Cast, Floor, Greatest, Least
 from django.templatetags.static import static
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from djmoney.models.fields import MoneyField
 from simple_history.models import HistoricalRecords
 
 from formula.encoders import PrettyJSONEncoder
 
+# Number of equally wide buckets of field statistics histograms
+HISTOGRAM_BUCKETS = 20
+
+# Date ranges OR'd into one rollup query, SQLite limits the expression depth
+ROLLUP_RANGES_PER_QUERY = 100
+
 
 class DriverStatus(models.TextChoices):
     ACTIVE = "ACTIVE", _("Active")
@@ -22,6 +35,20 @@ class DriverCategory(models.TextChoices):
     CHAMPION = "CHAMPION", _("Champion")
 
 
+class RollupPeriod(models.TextChoices):
+    DAY = "DAY", _("Day")
+    WEEK = "WEEK", _("Week")
+
+
+def normalize_name(value):
+    """
+    Lower-cased and accent-folded form of the value used for indexed name lookups.
+    """
+    value = unicodedata.normalize("NFKD", value or "")
+    value = "".join(char for char in value if not unicodedata.combining(char))
+    return " ".join(value.lower().split())
+
+
 class AuditedModel(models.Model):
     created_at = models.DateTimeField(_("created at"), auto_now_add=True)
     modified_at = models.DateTimeField(_("modified at"), auto_now=True)
@@ -100,6 +127,9 @@ class Circuit(AuditedModel):
         verbose_name = _("circuit")
         verbose_name_plural = _("circuits")
         ordering = ["weight"]
+        indexes = [
+            models.Index(fields=["country", "weight"]),
+        ]
 
     def __str__(self):
         return self.name
@@ -151,6 +181,9 @@ class Driver(AuditedModel):
         "Constructor", verbose_name=_("constructors"), blank=True
     )
     code = models.CharField(_("code"), max_length=3)
+    search_name = models.CharField(
+        _("search name"), max_length=511, default="", editable=False
+    )
     color = models.CharField(_("color"), null=True, blank=True, max_length=255)
     link = models.URLField(_("link"), null=True, blank=True)
     status = models.CharField(
@@ -193,6 +226,11 @@ class Driver(AuditedModel):
         verbose_name = _("driver")
         verbose_name_plural = _("drivers")
         permissions = (("update_statistics", _("Update statistics")),)
+        indexes = [
+            models.Index(fields=["status"]),
+            models.Index(fields=["category"]),
+            models.Index(fields=["salary"]),
+        ]
 
     def __str__(self):
         return self.full_name
@@ -204,6 +242,9 @@ class Driver(AuditedModel):
 
         return None
 
+    def get_search_name(self):
+        return normalize_name(f"{self.first_name} {self.last_name}")
+
     @property
     def initials(self):
         if self.first_name and self.last_name:
@@ -251,6 +292,14 @@ class Race(AuditedModel):
         verbose_name = _("race")
         verbose_name_plural = _("races")
         ordering = ["weight"]
+        indexes = [
+            models.Index(fields=["circuit", "weight"]),
+            models.Index(fields=["winner", "weight"]),
+            models.Index(fields=["laps", "weight"]),
+            models.Index(fields=["year"]),
+            models.Index(fields=["date"]),
+            models.Index(fields=["created_at"]),
+        ]
 
     def __str__(self):
         return f"{self.circuit.name}, {self.year}"
@@ -301,9 +350,521 @@ class Standing(AuditedModel):
         verbose_name = _("standing")
         verbose_name_plural = _("standings")
         ordering = ["weight"]
+        indexes = [
+            models.Index(fields=["driver", "weight"]),
+            models.Index(fields=["race", "position"]),
+        ]
 
     def __str__(self):
         return f"{self.driver.full_name}, {self.position}"
 
     def get_absolute_url(self):
         return "https://example.com"
+
+
+class DriverStatisticsManager(models.Manager):
+    def refresh(self, *driver_ids):
+        """
+        Recalculates statistics only for the given drivers so that saving a single
+        standing or race does not touch the rest of the table.
+        """
+        for driver_id in {driver_id for driver_id in driver_ids if driver_id}:
+            standings = Standing.objects.filter(driver_id=driver_id)
+            aggregates = standings.aggregate(
+                total_points=models.Sum("points"),
+                podiums=models.Count("pk", filter=models.Q(position__lte=3)),
+            )
+
+            self.update_or_create(
+                driver_id=driver_id,
+                defaults={
+                    "total_points": aggregates["total_points"] or 0,
+                    "podiums": aggregates["podiums"],
+                    "wins": Race.objects.filter(winner_id=driver_id).count(),
+                    "last_constructor_id": standings.order_by("-race__date", "-pk")
+                    .values_list("constructor_id", flat=True)
+                    .first(),
+                },
+            )
+
+
+class DriverStatistics(AuditedModel):
+    driver = models.OneToOneField(
+        Driver,
+        verbose_name=_("driver"),
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="statistics",
+    )
+    total_points = models.DecimalField(
+        _("total points"), decimal_places=2, max_digits=10, default=0
+    )
+    wins = models.PositiveIntegerField(_("wins"), default=0)
+    podiums = models.PositiveIntegerField(_("podiums"), default=0)
+    last_constructor = models.ForeignKey(
+        Constructor,
+        verbose_name=_("last constructor"),
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+
+    objects = DriverStatisticsManager()
+
+    class Meta:
+        db_table = "driver_statistics"
+        verbose_name = _("driver statistics")
+        verbose_name_plural = _("driver statistics")
+
+    def __str__(self):
+        return str(self.driver)
+
+
+class DriverSearchTokenManager(models.Manager):
+    def get_tokens(self, driver_id, search_name):
+        return [
+            DriverSearchToken(driver_id=driver_id, token=token)
+            for token in set(search_name.split())
+        ]
+
+    def refresh(self, driver):
+        with transaction.atomic():
+            self.filter(driver_id=driver.pk).delete()
+            self.bulk_create(self.get_tokens(driver.pk, driver.search_name))
+
+    def rebuild(self):
+        tokens = [
+            token
+            for driver_id, search_name in Driver.objects.values_list(
+                "pk", "search_name"
+            )
+            for token in self.get_tokens(driver_id, search_name)
+        ]
+
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(tokens, batch_size=1000)
+
+
+class DriverSearchToken(models.Model):
+    """
+    Words of `Driver.search_name`, one row per word. Word prefixes are looked up
+    by a range of the unique index instead of LIKE, which SQLite can't serve from
+    an index.
+    """
+
+    driver = models.ForeignKey(
+        Driver,
+        verbose_name=_("driver"),
+        on_delete=models.CASCADE,
+        related_name="search_tokens",
+    )
+    token = models.CharField(_("token"), max_length=255)
+
+    objects = DriverSearchTokenManager()
+
+    class Meta:
+        db_table = "driver_search_tokens"
+        verbose_name = _("driver search token")
+        verbose_name_plural = _("driver search tokens")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["token", "driver"], name="driver_search_tokens_token_driver"
+            ),
+        ]
+
+    def __str__(self):
+        return self.token
+
+
+def get_week_start(date):
+    return date - timedelta(days=date.weekday())
+
+
+def get_week_ranges(weeks):
+    """
+    Merges consecutive weeks into (first day, last day) ranges.
+    """
+    ranges = []
+
+    for week in sorted(set(weeks)):
+        if ranges and ranges[-1][1] + timedelta(1) == week:
+            ranges[-1] = (ranges[-1][0], week + timedelta(6))
+        else:
+            ranges.append((week, week + timedelta(6)))
+
+    return ranges
+
+
+class ActivityRollupManager(models.Manager):
+    def get_watermark(self):
+        return self.aggregate(models.Max("computed_at"))["computed_at__max"]
+
+    def rollup(self, weeks=None, computed_at=None):
+        """
+        Aggregates standings of the given weeks into daily and weekly rollups and
+        replaces rollups stored for them, all weeks are recalculated when `weeks`
+        is None. Returns the number of created rollups.
+        """
+        computed_at = computed_at or timezone.now()
+
+        if weeks is None:
+            batches = [None]
+        else:
+            ranges = get_week_ranges(weeks)
+            batches = [
+                ranges[i : i + ROLLUP_RANGES_PER_QUERY]
+                for i in range(0, len(ranges), ROLLUP_RANGES_PER_QUERY)
+            ]
+
+        count = 0
+
+        with transaction.atomic():
+            for batch in batches:
+                count += self.rollup_ranges(batch, computed_at)
+
+        return count
+
+    def rollup_ranges(self, ranges, computed_at):
+        standings = Standing.objects.all()
+        outdated = self.all()
+
+        if ranges is not None:
+            date_filter = models.Q()
+            week_filter = models.Q()
+
+            for date_range in ranges:
+                date_filter |= models.Q(race__date__range=date_range)
+                week_filter |= models.Q(date__range=date_range)
+
+            standings = standings.filter(date_filter)
+            outdated = outdated.filter(week_filter)
+
+        days = (
+            standings.values("race__date")
+            .annotate(
+                races=models.Count("race", distinct=True),
+                standings=models.Count("pk"),
+                points=models.Sum("points"),
+            )
+            .order_by("race__date")
+        )
+
+        rollups = []
+        totals = defaultdict(lambda: {"races": 0, "standings": 0, "points": Decimal()})
+
+        for day in days:
+            week = totals[get_week_start(day["race__date"])]
+            week["races"] += day["races"]
+            week["standings"] += day["standings"]
+            week["points"] += day["points"]
+
+            rollups.append(
+                ActivityRollup(
+                    period=RollupPeriod.DAY,
+                    date=day["race__date"],
+                    races=day["races"],
+                    standings=day["standings"],
+                    points=day["points"],
+                    computed_at=computed_at,
+                )
+            )
+
+        for date, week in totals.items():
+            rollups.append(
+                ActivityRollup(
+                    period=RollupPeriod.WEEK,
+                    date=date,
+                    computed_at=computed_at,
+                    **week,
+                )
+            )
+
+        outdated.delete()
+        self.bulk_create(rollups)
+        return len(rollups)
+
+
+class ActivityRollup(models.Model):
+    period = models.CharField(_("period"), choices=RollupPeriod, max_length=255)
+    date = models.DateField(_("date"))
+    races = models.PositiveIntegerField(_("races"), default=0)
+    standings = models.PositiveIntegerField(_("standings"), default=0)
+    points = models.DecimalField(
+        _("points"), decimal_places=2, max_digits=12, default=0
+    )
+    computed_at = models.DateTimeField(_("computed at"))
+
+    objects = ActivityRollupManager()
+
+    class Meta:
+        db_table = "activity_rollups"
+        verbose_name = _("activity rollup")
+        verbose_name_plural = _("activity rollups")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["period", "date"], name="activity_rollups_period_date"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_period_display()}, {self.date}"
+
+
+class FieldStatisticsManager(models.Manager):
+    def get_statistics(self, model, field_name):
+        """
+        Returns statistics of the field, empty ones when they were not built yet.
+        Reading never writes, statistics are built by migrations and
+        `rebuild_field_statistics`.
+        """
+        label = model._meta.concrete_model._meta.label_lower
+        statistics = self.filter(model=label, field=field_name).first()
+        return statistics or self.model(model=label, field=field_name)
+
+    def rebuild(self, model, field_name):
+        """
+        Aggregates the column and groups its values into histogram buckets. The
+        bucket layout stays fixed until the next rebuild.
+        """
+        queryset = model._default_manager.filter(
+            **{f"{field_name}__isnull": False}
+        ).order_by()
+        aggregates = queryset.aggregate(
+            count=models.Count("pk"),
+            min=models.Min(field_name),
+            max=models.Max(field_name),
+        )
+        histogram = [0] * HISTOGRAM_BUCKETS
+        start = size = None
+
+        if aggregates["count"]:
+            start = float(aggregates["min"])
+            size = (float(aggregates["max"]) - start) / HISTOGRAM_BUCKETS or 1
+            buckets = (
+                queryset.annotate(
+                    bucket=Least(
+                        Floor((Cast(field_name, models.FloatField()) - start) / size),
+                        models.Value(HISTOGRAM_BUCKETS - 1.0),
+                    )
+                )
+                .values_list("bucket")
+                .annotate(count=models.Count("pk"))
+            )
+
+            for bucket, count in buckets:
+                histogram[int(bucket)] += count
+
+        statistics, created = self.update_or_create(
+            model=model._meta.concrete_model._meta.label_lower,
+            field=field_name,
+            defaults={
+                "count": aggregates["count"],
+                "min_value": aggregates["min"],
+                "max_value": aggregates["max"],
+                "histogram_start": start,
+                "histogram_size": size,
+                "histogram": histogram,
+            },
+        )
+        return statistics
+
+    def record(self, model, field_name, removed=(), added=()):
+        """
+        Updates statistics by values removed from and added to the column, only
+        removing the minimum or maximum makes the bounds aggregated again. Values
+        outside of the histogram rebuild it with widened buckets. Statistics not
+        built yet are left to `rebuild_field_statistics`.
+        """
+        label = model._meta.concrete_model._meta.label_lower
+
+        with transaction.atomic():
+            statistics = (
+                self.select_for_update().filter(model=label, field=field_name).first()
+            )
+
+            if statistics is None:
+                return
+
+            if not all(statistics.covers(value) for value in added):
+                self.rebuild(model, field_name)
+                return
+
+            stale_bounds = False
+
+            for value in removed:
+                stale_bounds |= statistics.remove(value)
+
+            for value in added:
+                statistics.add(value)
+
+            if stale_bounds:
+                aggregates = model._default_manager.aggregate(
+                    min=models.Min(field_name), max=models.Max(field_name)
+                )
+                statistics.min_value = aggregates["min"]
+                statistics.max_value = aggregates["max"]
+
+            statistics.save()
+
+
+class FieldStatistics(models.Model):
+    model = models.CharField(_("model"), max_length=255)
+    field = models.CharField(_("field"), max_length=255)
+    count = models.PositiveIntegerField(_("count"), default=0)
+    min_value = models.FloatField(_("min value"), null=True, blank=True)
+    max_value = models.FloatField(_("max value"), null=True, blank=True)
+    histogram_start = models.FloatField(_("histogram start"), null=True, blank=True)
+    histogram_size = models.FloatField(_("histogram size"), null=True, blank=True)
+    histogram = models.JSONField(_("histogram"), default=list)
+
+    objects = FieldStatisticsManager()
+
+    class Meta:
+        db_table = "field_statistics"
+        verbose_name = _("field statistics")
+        verbose_name_plural = _("field statistics")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["model", "field"], name="field_statistics_model_field"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.model}.{self.field}"
+
+    def covers(self, value):
+        """
+        Returns True when the value falls into one of the histogram buckets.
+        """
+        if value is None:
+            return True
+
+        if self.histogram_start is None:
+            return False
+
+        end = self.histogram_start + HISTOGRAM_BUCKETS * self.histogram_size
+        return self.histogram_start <= float(value) <= end
+
+    def get_bucket(self, value):
+        # The end of the last bucket belongs to it
+        bucket = int((float(value) - self.histogram_start) // self.histogram_size)
+        return min(max(bucket, 0), HISTOGRAM_BUCKETS - 1)
+
+    def add(self, value):
+        if value is None:
+            return
+
+        value = float(value)
+        self.count += 1
+        self.histogram[self.get_bucket(value)] += 1
+        self.min_value = value if self.min_value is None else min(self.min_value, value)
+        self.max_value = value if self.max_value is None else max(self.max_value, value)
+
+    def remove(self, value):
+        """
+        Returns True when the removed value was one of the bounds.
+        """
+        if value is None or self.histogram_start is None:
+            return False
+
+        value = float(value)
+        bucket = self.get_bucket(value)
+        self.count = max(self.count - 1, 0)
+        self.histogram[bucket] = max(self.histogram[bucket] - 1, 0)
+        return value in (self.min_value, self.max_value)
+
+    def get_buckets(self):
+        """
+        Returns (from, to, count) of every bucket.
+        """
+        if self.histogram_start is None:
+            return []
+
+        return [
+            (
+                self.histogram_start + i * self.histogram_size,
+                self.histogram_start + (i + 1) * self.histogram_size,
+                count,
+            )
+            for i, count in enumerate(self.histogram)
+        ]
+
+
+class ViewProfileManager(models.Manager):
+    def record(self, profile):
+        """
+        Adds measurements of one sampled request. Every row is changed by a single
+        UPDATE of F() expressions, requests of all processes finishing at the same
+        time can't overwrite each other's samples.
+        """
+        queries = len(profile.queries)
+        # Insert racing with another process falls back to reading its row
+        view_profile, created = self.get_or_create(view=profile.view)
+        self.filter(pk=view_profile.pk).update(
+            requests=models.F("requests") + 1,
+            time=models.F("time") + profile.time,
+            queries=models.F("queries") + queries,
+            max_queries=Greatest("max_queries", models.Value(queries)),
+            duplicates=models.F("duplicates") + profile.duplicates,
+            sql_time=models.F("sql_time") + profile.sql_time,
+            render_time=models.F("render_time") + profile.render_time,
+        )
+
+        for name, duration in profile.callbacks.items():
+            callback, created = ViewProfileCallback.objects.get_or_create(
+                profile=view_profile, name=name
+            )
+            ViewProfileCallback.objects.filter(pk=callback.pk).update(
+                time=models.F("time") + duration
+            )
+
+
+class ViewProfile(models.Model):
+    """
+    Totals of sampled admin requests per view recorded by ProfilingMiddleware.
+    """
+
+    view = models.CharField(_("view"), max_length=255, unique=True)
+    requests = models.PositiveIntegerField(_("requests"), default=0)
+    time = models.FloatField(_("time"), default=0)
+    queries = models.PositiveIntegerField(_("queries"), default=0)
+    max_queries = models.PositiveIntegerField(_("max queries"), default=0)
+    duplicates = models.PositiveIntegerField(_("duplicates"), default=0)
+    sql_time = models.FloatField(_("SQL time"), default=0)
+    render_time = models.FloatField(_("render time"), default=0)
+
+    objects = ViewProfileManager()
+
+    class Meta:
+        db_table = "view_profiles"
+        verbose_name = _("view profile")
+        verbose_name_plural = _("view profiles")
+
+    def __str__(self):
+        return self.view
+
+
+class ViewProfileCallback(models.Model):
+    profile = models.ForeignKey(
+        ViewProfile,
+        verbose_name=_("profile"),
+        on_delete=models.CASCADE,
+        related_name="callbacks",
+    )
+    name = models.CharField(_("name"), max_length=255)
+    time = models.FloatField(_("time"), default=0)
+
+    class Meta:
+        db_table = "view_profile_callbacks"
+        verbose_name = _("view profile callback")
+        verbose_name_plural = _("view profile callbacks")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["profile", "name"], name="view_profile_callbacks_profile_name"
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
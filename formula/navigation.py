@@ -0,0 +1,133 @@
+from urllib.parse import urlparse
+
+from django.urls import reverse
+from django.utils.translation import get_language
+
+# Key of trie nodes holding patterns which end in the node
+MARKS = None
+
+
+class NavigationMatcher:
+    """
+    Resolves active state of navigation items. Links of all rules are reversed
+    once per language into a prefix trie, so one walk over the request path
+    finds every matching rule. Result is memoized on the request.
+    """
+
+    def __init__(self):
+        self.rules = []
+        self.tries = {}
+
+    def register(self, rule):
+        self.rules.append(rule)
+        self.tries.clear()
+
+    def get_trie(self):
+        language = get_language()
+
+        if language not in self.tries:
+            self.tries[language] = self.compile()
+
+        return self.tries[language]
+
+    def compile(self):
+        root = {}
+        index_path = reverse("admin:index")
+
+        for rule in self.rules:
+            for link, exact, exclude in rule.patterns:
+                node = root
+                path = get_link_path(link)
+
+                for char in path:
+                    node = node.setdefault(char, {})
+
+                # Every admin path starts with the dashboard link
+                node.setdefault(MARKS, []).append(
+                    (rule, exact or path == index_path, exclude)
+                )
+
+        return root
+
+    def match(self, path):
+        node = self.get_trie()
+        marks = []
+
+        for char in path:
+            if MARKS in node:
+                marks += [mark for mark in node[MARKS] if not mark[1]]
+
+            if (node := node.get(char)) is None:
+                break
+        else:
+            marks += node.get(MARKS, [])
+
+        included = {rule for rule, exact, exclude in marks if not exclude}
+        excluded = {rule for rule, exact, exclude in marks if exclude}
+
+        return included - excluded
+
+    def get_active(self, request):
+        key = (get_language(), request.path)
+        cached = getattr(request, "navigation_active", None)
+
+        if cached is None or cached[0] != key:
+            cached = (key, self.match(request.path))
+            request.navigation_active = cached
+
+        return cached[1]
+
+
+def get_link_path(link):
+    link = str(link)
+
+    # URL pattern names are reversed, everything else is treated as a link
+    if ":" in link and "/" not in link:
+        link = reverse(link)
+
+    return urlparse(link).path
+
+
+navigation = NavigationMatcher()
+
+
+class ActiveRule:
+    """
+    Declarative replacement of "active" callbacks. Item is active when the path
+    starts with one of `prefixes` or equals one of `exact` links and does not
+    start with any of `exclude`. Links are URL pattern names or lazy URLs.
+    """
+
+    def __init__(self, *prefixes, exact=(), exclude=()):
+        self.patterns = [
+            *[(link, False, False) for link in prefixes],
+            *[(link, True, False) for link in exact],
+            *[(link, False, True) for link in exclude],
+        ]
+        navigation.register(self)
+
+    def __call__(self, request):
+        return self in navigation.get_active(request)
+
+    def __deepcopy__(self, memo):
+        # Unfold copies navigation on every request, rules are immutable and
+        # have to stay the instances compiled into the matcher
+        return self
+
+
+def compile_navigation(groups):
+    """
+    Adds rules to navigation items without explicit "active" value, matching
+    the link as prefix like Unfold does by default.
+    """
+    for group in groups:
+        for item in group["items"]:
+            link = item.get("link")
+
+            if "active" not in item and link is not None and not callable(link):
+                item["active"] = ActiveRule(link)
+
+            if "items" in item:
+                compile_navigation([item])
+
+    return groups
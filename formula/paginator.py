@@ -0,0 +1,183 @@
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Page, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.functional import cached_property
+from unfold.paginator import InfinitePaginator
+
+from formula.counts import get_count
+
+CURSOR_VAR = "cursor"
+
+
+def encode_cursor(ordering, values, backward=False):
+    data = json.dumps([ordering, values, backward], cls=DjangoJSONEncoder)
+    return urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        data = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        ordering, values, backward = json.loads(data)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        return None
+
+    return ordering, values, bool(backward)
+
+
+class KeysetPage(Page):
+    keyset = True
+
+    def __init__(self, object_list, paginator, cursor, next_cursor, previous_cursor):
+        super().__init__(object_list, None, paginator)
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<Page {self.cursor or 'first'}>"
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator(InfinitePaginator):
+    """
+    Pages through the queryset by values of its ordering fields, e.g. `(weight,
+    id)`, instead of OFFSET. Each page is a range scan starting right after the
+    row in the opaque cursor, so its cost does not depend on depth. Querysets not
+    ordered by non-null columns are paged by offset like InfinitePaginator does.
+    """
+
+    @property
+    def template_name(self):
+        if self.keyset is None:
+            return super().template_name
+
+        return "formula/helpers/pagination_keyset.html"
+
+    @cached_property
+    def keyset(self):
+        """
+        Returns (field, descending) pairs of the ordering with primary key added
+        as a tiebreaker, or None when the ordering can't be used as a keyset.
+        """
+        opts = self.object_list.model._meta
+        ordering = list(self.object_list.query.order_by or opts.ordering)
+        keyset = []
+
+        for name in ordering:
+            if not isinstance(name, str):
+                return None
+
+            descending = name.startswith("-")
+            name = name.lstrip("-")
+
+            try:
+                field = opts.pk if name == "pk" else opts.get_field(name)
+            except FieldDoesNotExist:
+                return None
+
+            if field.null or field.is_relation or not field.concrete:
+                return None
+
+            keyset.append((field, descending))
+
+            # Primary key makes the ordering total, further fields never apply
+            if field.primary_key:
+                return keyset
+
+        return [*keyset, (opts.pk, False)]
+
+    @property
+    def ordering(self):
+        return [
+            f"{'-' if descending else ''}{field.attname}"
+            for field, descending in self.keyset
+        ]
+
+    def get_keyset_filter(self, values, backward):
+        """
+        Rows after `values` in the keyset ordering, before them when `backward`.
+        The leading range on the first field lets the database seek in its index.
+        """
+        conditions = Q()
+        equal = {}
+
+        for (field, descending), value in zip(self.keyset, values, strict=True):
+            lookup = "lt" if descending != backward else "gt"
+            conditions |= Q(**equal, **{f"{field.attname}__{lookup}": value})
+            equal[field.attname] = value
+
+        first, descending = self.keyset[0]
+        lookup = "lte" if descending != backward else "gte"
+
+        return Q(**{f"{first.attname}__{lookup}": values[0]}) & conditions
+
+    def get_values(self, obj):
+        return [getattr(obj, field.attname) for field, descending in self.keyset]
+
+    def page_for_cursor(self, cursor):
+        ordering = self.ordering
+        decoded = decode_cursor(cursor) if cursor else None
+
+        # Cursors of other orderings, e.g. after sorting by another column,
+        # start from the first page
+        if decoded is None or decoded[0] != ordering:
+            cursor, values, backward = None, None, False
+        else:
+            ordering, values, backward = decoded
+
+        queryset = self.object_list.order_by(*ordering)
+
+        if values is not None:
+            queryset = queryset.filter(self.get_keyset_filter(values, backward))
+
+        if backward:
+            queryset = queryset.reverse()
+
+        objects = list(queryset[: self.per_page + 1])
+        more = len(objects) > self.per_page
+        objects = objects[: self.per_page]
+
+        if backward:
+            objects.reverse()
+
+        first = self.get_values(objects[0]) if objects else values
+        last = self.get_values(objects[-1]) if objects else values
+        has_next = backward or more
+        has_previous = more if backward else values is not None
+
+        return KeysetPage(
+            objects,
+            self,
+            cursor,
+            encode_cursor(ordering, last) if has_next and last else None,
+            encode_cursor(ordering, first, backward=True)
+            if has_previous and first
+            else None,
+        )
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Uses the estimated number of rows of large querysets instead of COUNT(*).
+    Pages are numbered from the estimate, so the last pages may come out empty
+    until the list is counted exactly.
+    """
+
+    template_name = "formula/helpers/pagination_estimated.html"
+    exact = False
+    estimated = False
+
+    @cached_property
+    def count(self):
+        count, self.estimated = get_count(self.object_list, self.exact)
+        return count
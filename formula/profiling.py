@@ -0,0 +1,153 @@
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from functools import wraps
+
+from formula.models import ViewProfile
+
+# Number of slowest display callbacks reported per view
+SLOWEST_CALLBACKS = 5
+
+current_profile = ContextVar("current_profile", default=None)
+
+
+class Profile:
+    """
+    Measurements of one sampled request. Queries are recorded by `profile_queries`
+    while the instance is set in `current_profile`.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view = None
+        self.time = 0
+        self.queries = []
+        self.render_time = 0
+        self.callbacks = defaultdict(float)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, repr(params), time.perf_counter() - started))
+
+    def finish(self):
+        self.time = time.perf_counter() - self.started
+
+    @property
+    def sql_time(self):
+        return sum(duration for sql, params, duration in self.queries)
+
+    @property
+    def duplicates(self):
+        counts = Counter((sql, params) for sql, params, duration in self.queries)
+        return sum(count - 1 for count in counts.values())
+
+    def get_server_timing(self):
+        metrics = [
+            f'db;dur={self.sql_time * 1000:.1f};desc="{len(self.queries)} queries, '
+            f'{self.duplicates} duplicates"',
+            f"render;dur={self.render_time * 1000:.1f}",
+        ]
+
+        slowest = sorted(self.callbacks.items(), key=lambda item: -item[1])
+
+        for i, (name, duration) in enumerate(slowest[:SLOWEST_CALLBACKS]):
+            metrics.append(f'callback{i};dur={duration * 1000:.1f};desc="{name}"')
+
+        metrics.append(f"total;dur={self.time * 1000:.1f}")
+
+        return ", ".join(metrics)
+
+
+def profile_queries(execute, sql, params, many, context):
+    """
+    Database execute wrapper installed on every connection. Connections are local
+    to threads, the context variable reaches also sync code of async requests.
+    """
+    profile = current_profile.get()
+
+    if profile is None:
+        return execute(sql, params, many, context)
+
+    return profile(execute, sql, params, many, context)
+
+
+def install_query_profiler(connection):
+    # Prepended for the same reason as the readonly write blocker
+    if profile_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, profile_queries)
+
+
+def profile_callback(name, func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = current_profile.get()
+
+        if profile is None:
+            return func(*args, **kwargs)
+
+        started = time.perf_counter()
+
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.callbacks[name] += time.perf_counter() - started
+
+    wrapper.profiled = True
+    return wrapper
+
+
+def instrument_display_callbacks(site):
+    """
+    Wraps model admin methods listed in `list_display` so that their time is
+    recorded for sampled requests. Outside of sampled requests the wrapper only
+    checks the context variable.
+    """
+    for model_admin in site._registry.values():
+        model_admin_class = model_admin.__class__
+
+        for name in model_admin.list_display:
+            func = (
+                getattr(model_admin_class, name, None)
+                if isinstance(name, str)
+                else None
+            )
+
+            if callable(func) and not getattr(func, "profiled", False):
+                setattr(model_admin_class, name, profile_callback(name, func))
+
+
+def record_profile(profile):
+    ViewProfile.objects.record(profile)
+
+
+def get_profiles():
+    """
+    Returns averages of sampled requests per view, slowest views first.
+    """
+    profiles = []
+
+    for stats in ViewProfile.objects.prefetch_related("callbacks"):
+        requests = stats.requests or 1
+        callbacks = sorted(stats.callbacks.all(), key=lambda callback: -callback.time)
+        profiles.append(
+            {
+                "view": stats.view,
+                "requests": stats.requests,
+                "time": stats.time * 1000 / requests,
+                "queries": stats.queries / requests,
+                "max_queries": stats.max_queries,
+                "duplicates": stats.duplicates / requests,
+                "sql_time": stats.sql_time * 1000 / requests,
+                "render_time": stats.render_time * 1000 / requests,
+                "callbacks": [
+                    (callback.name, callback.time * 1000 / requests)
+                    for callback in callbacks[:SLOWEST_CALLBACKS]
+                ],
+            }
+        )
+
+    return sorted(profiles, key=lambda profile: -profile["time"])
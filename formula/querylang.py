@@ -0,0 +1,207 @@
+import json
+from functools import cache, lru_cache
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.exceptions import FieldError, ValidationError
+from django.http import HttpResponse
+from django.urls import reverse
+from djangoql.admin import DjangoQLSearchMixin
+from djangoql.ast import Logical
+from djangoql.exceptions import DjangoQLError
+from djangoql.parser import DjangoQLParser
+from djangoql.queryset import build_filter
+from djangoql.serializers import SuggestionsAPISerializer
+from djangoql.views import SuggestionsAPIView
+
+from formula.counts import count_rows, estimate_count
+from formula.exceptions import QueryCostException
+
+# Number of compiled searches kept in every process
+QUERY_CACHE_SIZE = 256
+
+
+@cache
+def get_schema(schema_class, model):
+    """
+    Returns schema instance shared by all requests. Introspection walks all
+    models reachable from the model, models do not change while the process runs.
+    """
+    return schema_class(model)
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def compile_search(schema_class, model, search):
+    """
+    Parses and validates the search, returns its filter, relation paths the
+    filter joins and the part of the filter on fields of the model itself.
+    Repeated searches skip parsing entirely.
+    """
+    schema = get_schema(schema_class, model)
+    node = DjangoQLParser().parse(search)
+    schema.validate(node)
+
+    return (
+        build_filter(node, schema),
+        frozenset(get_relation_paths(node, schema)),
+        get_local_filter(node, schema),
+    )
+
+
+def get_relation_paths(node, schema):
+    if isinstance(node.operator, Logical):
+        yield from get_relation_paths(node.left, schema)
+        yield from get_relation_paths(node.right, schema)
+        return
+
+    parts = tuple(node.left.parts)
+
+    # Relations compared to None, e.g. `standings = None`, end with a relation
+    if schema.resolve_name(node.left) is None:
+        yield parts
+    else:
+        yield parts[:-1]
+
+
+def get_local_filter(node, schema):
+    """
+    Returns filter every matching row has to pass without joining related
+    models, None when the search restricts the model only through relations.
+    """
+    if isinstance(node.operator, Logical):
+        left = get_local_filter(node.left, schema)
+        right = get_local_filter(node.right, schema)
+
+        if node.operator.operator == "or":
+            return left | right if left and right else None
+
+        return left & right if left and right else left or right
+
+    if len(node.left.parts) > 1 or schema.resolve_name(node.left) is None:
+        return None
+
+    return build_filter(node, schema)
+
+
+def get_join_rows(field, model):
+    if field.many_to_many:
+        # Forward and reverse many-to-many fields expose the through model
+        # differently
+        through = field.remote_field.through if field.concrete else field.through
+        return count_rows(through)
+
+    return count_rows(field.related_model)
+
+
+def get_fan_outs(model, paths):
+    """
+    Returns average number of related rows per row for every to-many relation on
+    the paths. The same relation joined by several conditions counts once.
+    """
+    fan_outs = {}
+
+    for path in paths:
+        current = model
+
+        for i, name in enumerate(path):
+            field = current._meta.get_field(name)
+
+            if field.one_to_many or field.many_to_many:
+                rows = max(count_rows(current), 1)
+                fan_outs[path[: i + 1]] = max(get_join_rows(field, current) / rows, 1)
+
+            current = field.related_model
+
+    return fan_outs
+
+
+def estimate_cost(queryset, condition, local_condition, fan_outs):
+    """
+    Estimates rows produced by joins of the search. The PostgreSQL planner
+    accounts for selectivity of the conditions. Where the filtered queryset can't
+    be estimated, rows of the model matching conditions on its own fields are
+    counted and every to-many relation multiplies them by its fan-out.
+    """
+    estimate = estimate_count(queryset.filter(condition))
+
+    if estimate is not None:
+        return estimate
+
+    if local_condition is not None:
+        queryset = queryset.filter(local_condition)
+
+    if queryset.query.has_filters():
+        cost = queryset.order_by().count()
+    else:
+        cost = count_rows(queryset.model)
+
+    for fan_out in fan_outs.values():
+        cost *= fan_out
+
+    return round(cost)
+
+
+class CachedDjangoQLSearchMixin(DjangoQLSearchMixin):
+    """
+    DjangoQL search reusing compiled searches and one schema per model. Searches
+    expected to produce more than `djangoql_cost_limit` joined rows are rejected
+    with a warning same as invalid ones, the rest is checked as an EXISTS
+    semi-join when it spans to-many relations.
+    """
+
+    # Falls back to DJANGOQL_COST_LIMIT setting
+    djangoql_cost_limit = None
+
+    def get_djangoql_cost_limit(self):
+        if self.djangoql_cost_limit is None:
+            return settings.DJANGOQL_COST_LIMIT
+
+        return self.djangoql_cost_limit
+
+    def get_djangoql_schema(self):
+        return get_schema(self.djangoql_schema, self.model)
+
+    def get_search_results(self, request, queryset, search_term):
+        if (
+            self.search_mode_toggle_enabled()
+            and not self.djangoql_search_enabled(request)
+        ) or not search_term:
+            return super().get_search_results(request, queryset, search_term)
+
+        try:
+            condition, paths, local_condition = compile_search(
+                self.djangoql_schema, queryset.model, search_term
+            )
+            fan_outs = get_fan_outs(queryset.model, paths)
+
+            if limit := self.get_djangoql_cost_limit():
+                cost = estimate_cost(queryset, condition, local_condition, fan_outs)
+
+                if cost > limit:
+                    raise QueryCostException(cost)
+        except (DjangoQLError, ValueError, FieldError, ValidationError) as e:
+            messages.add_message(
+                request, messages.WARNING, self.djangoql_error_message(e)
+            )
+            return queryset.none(), False
+
+        # Joins of to-many relations repeat rows, changelist then filters by
+        # EXISTS subquery which also stops at the first matching related row
+        return queryset.filter(condition), bool(fan_outs)
+
+    def introspect(self, request):
+        suggestions_url = reverse(
+            f"{self.admin_site.name}:{self.model._meta.app_label}_"
+            f"{self.model._meta.model_name}_djangoql_suggestions"
+        )
+        serializer = SuggestionsAPISerializer(suggestions_url)
+        response = serializer.serialize(self.get_djangoql_schema())
+
+        return HttpResponse(
+            content=json.dumps(response, indent=2),
+            content_type="application/json; charset=utf-8",
+        )
+
+    def suggestions(self, request):
+        view = SuggestionsAPIView.as_view(schema=self.get_djangoql_schema())
+        return view(request)
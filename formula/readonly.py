@@ -0,0 +1,32 @@
+import re
+
+from django.conf import settings
+
+from formula.exceptions import ReadonlyException
+
+# Data modifying statements and the table they write into
+WRITE_STATEMENT = re.compile(
+    r"""^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?"""
+    r"""|DELETE\s+FROM)\s+[`"]?(\w+)""",
+    re.IGNORECASE,
+)
+
+
+def block_writes(execute, sql, params, many, context):
+    """
+    Database execute wrapper rejecting writes into tables not listed in
+    READONLY_ALLOWED_TABLES. Covers bulk operations, queryset updates and raw SQL.
+    """
+    match = WRITE_STATEMENT.match(sql)
+
+    if match and match.group(1) not in settings.READONLY_ALLOWED_TABLES:
+        raise ReadonlyException(code="database_write")
+
+    return execute(sql, params, many, context)
+
+
+def install_write_blocker(connection):
+    # Prepended, connection can be opened inside of execute_wrapper() context
+    # which removes the last wrapper on exit
+    if block_writes not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, block_writes)
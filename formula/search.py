@@ -0,0 +1,236 @@
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+from django.utils.text import smart_split, unescape_string_literal
+from modeltranslation.translator import NotRegistered, translator
+
+from formula.models import normalize_name
+
+# Trigram matching needs at least three characters per search term
+MIN_TERM_LENGTH = 3
+
+# Prefixes of `search_fields` choosing the lookup, e.g. "^name"
+LOOKUP_PREFIXES = "^=@"
+
+BATCH_SIZE = 1000
+
+
+def get_search_terms(search_term):
+    """
+    Returns terms normalized the same way as documents, so that accents and case
+    do not matter on either side.
+    """
+    terms = []
+
+    for term in smart_split(search_term):
+        if term.startswith(('"', "'")) and term[0] == term[-1]:
+            term = unescape_string_literal(term)
+
+        if term := normalize_name(term):
+            terms.append(term)
+
+    return terms
+
+
+def get_field_names(model, name):
+    """
+    Returns the field name followed by names of its translation fields.
+    """
+    try:
+        options = translator.get_options_for_model(model._meta.concrete_model)
+    except NotRegistered:
+        return [name]
+
+    return [name] + [
+        translation.name for translation in options.all_fields.get(name, [])
+    ]
+
+
+class SearchIndex:
+    """
+    Search documents for one model stored in `<db_table>_search`, keyed by primary
+    key. On SQLite it is an FTS5 table with trigram tokenizer, on PostgreSQL a table
+    with trigram GIN index. Both allow substring matching like `icontains` does.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+        self.table = f"{model._meta.db_table}_search"
+
+    def get_related_paths(self):
+        """
+        Returns lookups to instances of related models whose values are part of
+        the document, e.g. `race__circuit` for `race__circuit__name`.
+        """
+        paths = {}
+
+        for field in self.fields:
+            model = self.model
+            parts = field.split("__")
+
+            for i, part in enumerate(parts[:-1]):
+                model = model._meta.get_field(part).related_model
+                paths.setdefault(model, []).append("__".join(parts[: i + 1]))
+
+        return paths
+
+    def get_select_related(self):
+        return {path for paths in self.get_related_paths().values() for path in paths}
+
+    def get_source_fields(self):
+        """
+        Returns fields of the model and of related models whose values are part
+        of the document, including relations leading to them and translations.
+        """
+        sources = {}
+
+        for field in self.fields:
+            model = self.model
+
+            for part in field.split("__"):
+                sources.setdefault(model, []).extend(get_field_names(model, part))
+                model = model._meta.get_field(part).related_model
+
+        return {model: list(dict.fromkeys(names)) for model, names in sources.items()}
+
+    def get_document(self, instance):
+        values = []
+
+        for field in self.fields:
+            obj = instance
+            *relations, name = field.split("__")
+
+            for relation in relations:
+                obj = getattr(obj, relation)
+
+            values += [
+                str(getattr(obj, name) or "") for name in get_field_names(obj, name)
+            ]
+
+        return normalize_name(" ".join(value for value in values if value))
+
+    def create_table(self, schema_editor):
+        table = schema_editor.quote_name(self.table)
+
+        if schema_editor.connection.vendor == "sqlite":
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {table} USING fts5(body, tokenize='trigram')"
+            )
+            return
+
+        schema_editor.execute(
+            f"CREATE TABLE {table} (id bigint PRIMARY KEY, body text NOT NULL)"
+        )
+
+        if schema_editor.connection.vendor == "postgresql":
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            schema_editor.execute(
+                f"CREATE INDEX {schema_editor.quote_name(self.table + '_body')} "
+                f"ON {table} USING gin (body gin_trgm_ops)"
+            )
+
+    def delete_table(self, schema_editor):
+        schema_editor.execute(f"DROP TABLE {schema_editor.quote_name(self.table)}")
+
+    @property
+    def id_column(self):
+        return "rowid" if connection.vendor == "sqlite" else "id"
+
+    def update(self, queryset):
+        queryset = queryset.select_related(*self.get_select_related()).order_by("pk")
+        documents = None
+
+        while documents != []:
+            if documents:
+                queryset = queryset.filter(pk__gt=documents[-1][0])
+
+            documents = [
+                (instance.pk, self.get_document(instance))
+                for instance in queryset[:BATCH_SIZE]
+            ]
+            # Without transaction every inserted row is committed separately
+            with transaction.atomic(), connection.cursor() as cursor:
+                self.delete([pk for pk, document in documents])
+                cursor.executemany(
+                    f"INSERT INTO {self.table} ({self.id_column}, body) VALUES (%s, %s)",
+                    documents,
+                )
+
+    def update_related(self, instance):
+        model = instance._meta.concrete_model
+
+        for path in self.get_related_paths().get(model, []):
+            self.update(self.model.objects.filter(**{path: instance}))
+
+    def delete(self, pks):
+        if not pks:
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE {self.id_column} IN "
+                f"({', '.join(['%s'] * len(pks))})",
+                pks,
+            )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+
+        self.update(self.model.objects.all())
+
+    def supports(self, search_term):
+        return bool(get_search_terms(search_term))
+
+    def search(self, search_term):
+        """
+        Returns subquery of primary keys of documents containing all search terms.
+        Terms shorter than MIN_TERM_LENGTH can't be matched by trigrams, on SQLite
+        their documents are scanned with LIKE instead.
+        """
+        terms = get_search_terms(search_term)
+
+        if connection.vendor == "sqlite" and all(
+            len(term) >= MIN_TERM_LENGTH for term in terms
+        ):
+            query = " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+            return RawSQL(
+                f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s",
+                [query],
+            )
+
+        return RawSQL(
+            f"SELECT {self.id_column} FROM {self.table} WHERE "
+            + " AND ".join(["body LIKE %s ESCAPE '\\'"] * len(terms)),
+            [f"%{connection.ops.prep_for_like_query(term)}%" for term in terms],
+        )
+
+
+# Search indexes of models registered with SearchIndexMixin admins
+search_indexes = {}
+
+
+class SearchIndexMixin:
+    """
+    Resolves changelist search through the search index of the model, so that
+    all terms are matched against the same normalized documents regardless of
+    their length. Documents consist of the values of `search_fields`.
+    """
+
+    def __init__(self, model, admin_site):
+        super().__init__(model, admin_site)
+        model = model._meta.concrete_model
+        search_indexes.setdefault(
+            model,
+            SearchIndex(
+                model, [field.lstrip(LOOKUP_PREFIXES) for field in self.search_fields]
+            ),
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        index = search_indexes.get(self.model._meta.concrete_model)
+
+        if index is None or not index.supports(search_term):
+            return super().get_search_results(request, queryset, search_term)
+
+        return queryset.filter(pk__in=index.search(search_term)), False
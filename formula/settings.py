@@ -9,6 +9,8 @@ from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
 from unfold.contrib.constance.settings import UNFOLD_CONSTANCE_ADDITIONAL_FIELDS
 
+from formula.navigation import compile_navigation
+
 ######################################################################
 # General
 ######################################################################
@@ -22,6 +24,11 @@ ROOT_URLCONF = "formula.urls"
 
 WSGI_APPLICATION = "formula.wsgi.application"
 
+ASGI_APPLICATION = "formula.asgi.application"
+
+# Served by formula.asgi with uvicorn workers, see gunicorn.conf.py
+ASGI = environ.get("ASGI") == "1"
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 10_000
@@ -84,12 +91,40 @@ MIDDLEWARE = [
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.auth.middleware.LoginRequiredMiddleware",
+    "formula.middleware.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "simple_history.middleware.HistoryRequestMiddleware",
     "formula.middleware.ReadonlyExceptionHandlerMiddleware",
 ]
 
+# WhiteNoise is synchronous only and would run every async request in a thread
+if ASGI:
+    MIDDLEWARE[MIDDLEWARE.index("whitenoise.middleware.WhiteNoiseMiddleware")] = (
+        "formula.middleware.AsyncWhiteNoiseMiddleware"
+    )
+
+######################################################################
+# Readonly mode
+######################################################################
+# Outside of DEBUG, writes are rejected on database connections
+READONLY = not DEBUG
+
+# Profiles of sampled requests are recorded also in readonly mode
+READONLY_ALLOWED_TABLES = ["studio_options", "view_profiles", "view_profile_callbacks"]
+
+######################################################################
+# Profiling
+######################################################################
+# Fraction of admin requests profiled by formula.middleware.ProfilingMiddleware
+PROFILING_SAMPLE_RATE = float(environ.get("PROFILING_SAMPLE_RATE", "0.05"))
+
+######################################################################
+# DjangoQL
+######################################################################
+# Searches expected to produce more joined rows are rejected, 0 disables the limit
+DJANGOQL_COST_LIMIT = int(environ.get("DJANGOQL_COST_LIMIT", "1000000"))
+
 ######################################################################
 # Sessions
 ######################################################################
@@ -125,6 +160,25 @@ DATABASES = {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "database.sqlite",
     },
+    # Cache entries shared by all processes, created by `createcachetable`
+    "cache": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "cache.sqlite",
+    },
+}
+
+DATABASE_ROUTERS = ["formula.cache.CacheRouter"]
+
+######################################################################
+# Cache
+######################################################################
+# Cache versions and incremental updates must reach every gunicorn worker and
+# management command, a per-process LocMemCache would keep them stale
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "cache_entries",
+    },
 }
 
 ######################################################################
@@ -377,7 +431,7 @@ UNFOLD = {
                         "title": _("Races"),
                         "icon": "stadium",
                         "link": reverse_lazy("admin:formula_race_changelist"),
-                        "badge": "formula.utils.badge_callback",
+                        "badge": "formula.utils.upcoming_races_badge_callback",
                         "badge_variant": "danger",
                         "badge_style": "solid",
                     },
@@ -411,6 +465,12 @@ UNFOLD = {
                         "icon": "group",
                         "link": reverse_lazy("admin:auth_group_changelist"),
                     },
+                    {
+                        "title": _("Profiling"),
+                        "icon": "speed",
+                        "link": reverse_lazy("admin:profiling"),
+                        "permission": lambda request: request.user.is_superuser,
+                    },
                 ],
             },
             {
@@ -458,6 +518,9 @@ UNFOLD = {
     },
 }
 
+# Active state of sidebar items is resolved by the precompiled navigation matcher
+compile_navigation(UNFOLD["SIDEBAR"]["navigation"])
+
 UNFOLD_STUDIO_ENABLE_CUSTOMIZER = True
 
 UNFOLD_STUDIO_DEFAULT_FRAGMENT = "color-schemes"
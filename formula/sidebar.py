@@ -0,0 +1,92 @@
+import hashlib
+
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.utils.html import conditional_escape
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+
+from formula.cache import get_models_version
+
+SIDEBAR_TIMEOUT = 60 * 60
+
+# Overridden by formula/templates, which renders the Unfold template from cache
+APP_LIST_TEMPLATE = "unfold/helpers/app_list.html"
+
+# Placeholder rendered into cached markup instead of the badge value
+BADGE_HOLE = "<!--formula:badge:{}-->"
+
+
+def iter_navigation_items(items):
+    for item in items:
+        yield item
+
+        if "items" in item:
+            yield from iter_navigation_items(item["items"])
+
+
+def get_sidebar_key(request, sidebar):
+    """
+    Sidebar markup depends on language, items the user is allowed to see, dynamic
+    links and active items. Version of groups and permissions is part of the key
+    so that changes of permissions invalidate all stored sidebars.
+    """
+    user = request.user
+    items = list(iter_navigation_items(sidebar))
+    state = (
+        # Superusers pass every check, their permissions are not even loaded
+        ["*"] if user.is_superuser else sorted(user.get_all_permissions()),
+        [item.get("has_permission", True) for item in items],
+        [str(item["link_callback"]) for item in items if "link_callback" in item],
+    )
+    permissions = hashlib.sha256(repr(state).encode()).hexdigest()[:16]
+    active = ".".join(str(i) for i, item in enumerate(items) if item.get("active"))
+
+    return (
+        f"formula:sidebar:{get_language()}:{get_models_version([Group, Permission])}:"
+        f"{permissions}:{active or '-'}"
+    )
+
+
+def get_app_list_template(engine):
+    """
+    Returns the Unfold app list template, skipping the override found first.
+    """
+    template, override = engine.find_template(APP_LIST_TEMPLATE)
+    template, origin = engine.find_template(APP_LIST_TEMPLATE, skip=[override])
+    return template
+
+
+def render_sidebar(context):
+    """
+    Renders the app list of the sidebar from cache. Badge callbacks are left out
+    of the cached markup as holes and evaluated on every request.
+    """
+    sidebar = context["sidebar_navigation"]
+    key = get_sidebar_key(context["request"], sidebar)
+    badges = [
+        item for item in iter_navigation_items(sidebar) if "badge_callback" in item
+    ]
+    html = cache.get(key)
+
+    if html is None:
+        callbacks = [item["badge_callback"] for item in badges]
+
+        try:
+            for i, item in enumerate(badges):
+                item["badge_callback"] = mark_safe(BADGE_HOLE.format(i))
+
+            template = get_app_list_template(context.template.engine)
+            html = template.render(context)
+        finally:
+            for item, callback in zip(badges, callbacks, strict=True):
+                item["badge_callback"] = callback
+
+        cache.set(key, html, SIDEBAR_TIMEOUT)
+
+    for i, item in enumerate(badges):
+        html = html.replace(
+            BADGE_HOLE.format(i), str(conditional_escape(item["badge_callback"]))
+        )
+
+    return mark_safe(html)
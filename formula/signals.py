@@ -1,22 +1,273 @@
 from django.conf import settings
-from django.db.models.signals import pre_delete, pre_save
+from django.contrib.auth.models import Group, Permission
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from formula.exceptions import ReadonlyException
+from formula.cache import CACHE_DATABASE, bump_model_version
+from formula.filters import field_statistics
+from formula.models import (
+    ActivityRollup,
+    Circuit,
+    Constructor,
+    Driver,
+    DriverSearchToken,
+    DriverStatistics,
+    DriverWithFilters,
+    FieldStatistics,
+    Race,
+    Standing,
+    User,
+    get_week_start,
+)
+from formula.profiling import install_query_profiler
+from formula.readonly import install_write_blocker
+from formula.search import search_indexes
 
+STATISTICS_DRIVER_FIELDS = {
+    Race: "winner_id",
+    Standing: "driver_id",
+}
+
+
+@receiver(connection_created)
+def enable_readonly_mode(sender, connection, **kwargs):
+    # Cache database holds no application data
+    if settings.READONLY and connection.alias != CACHE_DATABASE:
+        install_write_blocker(connection)
+
+
+@receiver(connection_created)
+def enable_query_profiling(sender, connection, **kwargs):
+    # Cache lookups are not queries of the profiled view
+    if connection.alias != CACHE_DATABASE:
+        install_query_profiler(connection)
+
+
+@receiver(pre_save, sender=Driver)
+@receiver(pre_save, sender=DriverWithFilters)
+def update_search_name(sender, instance, **kwargs):
+    instance.search_name = instance.get_search_name()
+
+
+@receiver(post_save, sender=Driver)
+@receiver(post_save, sender=DriverWithFilters)
+def update_search_tokens(sender, instance, created=False, **kwargs):
+    previous = getattr(instance, "_previous_values", {})
+
+    if created or previous.get("search_name") != instance.search_name:
+        DriverSearchToken.objects.refresh(instance)
+
+
+def get_filter_fields(model):
+    return field_statistics.get(model._meta.concrete_model, [])
+
+
+def get_search_fields(model):
+    model = model._meta.concrete_model
+    fields = []
+
+    for index in search_indexes.values():
+        fields += index.get_source_fields().get(model, [])
+
+    return fields
+
+
+def get_previous_fields(model):
+    """
+    Returns fields whose values before save are compared with saved values by
+    post_save receivers.
+    """
+    fields = get_filter_fields(model) + get_search_fields(model)
+
+    if model in STATISTICS_DRIVER_FIELDS:
+        fields.append(STATISTICS_DRIVER_FIELDS[model])
+
+    # Moved races change rollups of two weeks and last constructors of drivers
+    if model is Race:
+        fields.append("date")
+
+    # Search tokens are refreshed only when the search name changes
+    if model._meta.concrete_model is Driver:
+        fields.append("search_name")
+
+    return list(dict.fromkeys(fields))
+
+
+@receiver(pre_save, sender=Circuit)
+@receiver(pre_save, sender=Driver)
+@receiver(pre_save, sender=DriverWithFilters)
+@receiver(pre_save, sender=Race)
+@receiver(pre_save, sender=Standing)
+def remember_previous_values(sender, instance, **kwargs):
+    # One query for all receivers instead of one per receiver
+    instance._previous_values = {}
+    fields = get_previous_fields(sender)
+
+    if instance._state.adding or instance.pk is None or not fields:
+        return
+
+    previous = sender.objects.filter(pk=instance.pk).values(*fields).first()
+
+    if previous:
+        instance._previous_values = previous
+
+
+def get_field_value(instance, field_name):
+    # Money and similar composite values are compared by their stored value
+    field = instance._meta.get_field(field_name)
+    return field.to_python(field.value_from_object(instance))
 
-def prevent_modifications(sender, instance, **kwargs):
-    if not settings.DEBUG and sender._meta.db_table != "studio_options":
-        raise ReadonlyException(
-            "Database is operating in readonly mode. Not possible to save any data."
-        )
 
+@receiver(post_save, sender=Race)
+@receiver(post_save, sender=Standing)
+def update_driver_statistics(sender, instance, **kwargs):
+    field = STATISTICS_DRIVER_FIELDS[sender]
+    previous = getattr(instance, "_previous_values", {})
+    driver_ids = [getattr(instance, field), previous.get(field)]
 
-@receiver(pre_save)
-def block_save(sender, instance, **kwargs):
-    prevent_modifications(sender, instance, **kwargs)
+    # Race date decides which constructor was the last one for every classified driver
+    if sender is Race and previous.get("date") not in (None, instance.date):
+        driver_ids += instance.standing_set.values_list("driver_id", flat=True)
 
+    DriverStatistics.objects.refresh(*driver_ids)
 
-@receiver(pre_delete)
-def block_delete(sender, instance, **kwargs):
-    prevent_modifications(sender, instance, **kwargs)
+
+@receiver(post_save, sender=Race)
+def update_activity_rollups(sender, instance, **kwargs):
+    previous_date = getattr(instance, "_previous_values", {}).get("date")
+
+    if previous_date in (None, instance.date):
+        return
+
+    # Rollup command finds changed races by modification time, but not the week
+    # the race was moved out of. Rollups keep the watermark of the last run, so
+    # the command still picks up everything changed since then.
+    watermark = ActivityRollup.objects.get_watermark()
+
+    if watermark is None:
+        return
+
+    weeks = {get_week_start(previous_date), get_week_start(instance.date)}
+    ActivityRollup.objects.rollup(weeks, computed_at=watermark)
+    bump_model_version(ActivityRollup)
+
+
+@receiver(post_delete, sender=Race)
+@receiver(post_delete, sender=Standing)
+def delete_driver_statistics(sender, instance, **kwargs):
+    DriverStatistics.objects.refresh(
+        getattr(instance, STATISTICS_DRIVER_FIELDS[sender])
+    )
+
+
+@receiver(post_save, sender=Circuit)
+@receiver(post_save, sender=Constructor)
+@receiver(post_save, sender=Driver)
+@receiver(post_save, sender=DriverWithFilters)
+@receiver(post_save, sender=Group)
+@receiver(post_save, sender=Race)
+@receiver(post_save, sender=Standing)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=Circuit)
+@receiver(post_delete, sender=Constructor)
+@receiver(post_delete, sender=Driver)
+@receiver(post_delete, sender=DriverWithFilters)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Race)
+@receiver(post_delete, sender=Standing)
+@receiver(post_delete, sender=User)
+def invalidate_model_cache(sender, **kwargs):
+    bump_model_version(sender)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+@receiver(m2m_changed, sender=Group.permissions.through)
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_sidebar_cache(sender, action=None, **kwargs):
+    # Cached sidebars are stored under the version of groups and permissions
+    if action is None or action.startswith("post_"):
+        bump_model_version(Permission)
+
+
+@receiver(post_save, sender=Circuit)
+@receiver(post_save, sender=Driver)
+@receiver(post_save, sender=DriverWithFilters)
+@receiver(post_save, sender=Race)
+@receiver(post_save, sender=Standing)
+def update_search_index(sender, instance, created=False, raw=False, **kwargs):
+    # Fixtures are loaded without related objects in place, indexes are rebuilt
+    # afterwards by `rebuild_search_index`
+    if raw:
+        return
+
+    model = sender._meta.concrete_model
+    previous = getattr(instance, "_previous_values", {})
+
+    for index_model, index in search_indexes.items():
+        fields = index.get_source_fields().get(model, [])
+
+        # Saves not changing any value of the documents keep them as they are
+        if not created and all(
+            field_name in previous
+            and previous[field_name] == get_field_value(instance, field_name)
+            for field_name in fields
+        ):
+            continue
+
+        if index_model is model:
+            index.update(model.objects.filter(pk=instance.pk))
+
+        index.update_related(instance)
+
+
+@receiver(post_delete, sender=Driver)
+@receiver(post_delete, sender=DriverWithFilters)
+@receiver(post_delete, sender=Race)
+@receiver(post_delete, sender=Standing)
+def delete_search_index(sender, instance, **kwargs):
+    search_indexes[sender._meta.concrete_model].delete([instance.pk])
+
+
+@receiver(post_save, sender=Circuit)
+@receiver(post_save, sender=Driver)
+@receiver(post_save, sender=DriverWithFilters)
+@receiver(post_save, sender=Race)
+def update_filter_values(sender, instance, raw=False, **kwargs):
+    model = sender._meta.concrete_model
+    previous = getattr(instance, "_previous_values", {})
+    changes = {}
+
+    for field_name in get_filter_fields(sender):
+        value = get_field_value(instance, field_name)
+
+        if field_name not in previous:
+            changes[field_name] = ([], [value])
+        elif previous[field_name] != value:
+            changes[field_name] = ([previous[field_name]], [value])
+
+    for field_name in field_statistics.get(model, []):
+        # Fixtures may overwrite existing rows without previous values known
+        if raw:
+            FieldStatistics.objects.filter(
+                model=model._meta.label_lower, field=field_name
+            ).delete()
+        elif field_name in changes:
+            FieldStatistics.objects.record(model, field_name, *changes[field_name])
+
+
+@receiver(post_delete, sender=Circuit)
+@receiver(post_delete, sender=Driver)
+@receiver(post_delete, sender=DriverWithFilters)
+@receiver(post_delete, sender=Race)
+def delete_filter_values(sender, instance, **kwargs):
+    model = sender._meta.concrete_model
+
+    for field_name in field_statistics.get(model, []):
+        FieldStatistics.objects.record(
+            model, field_name, removed=[get_field_value(instance, field_name)]
+        )
@@ -0,0 +1,128 @@
+import datetime
+
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.admin.views.main import PAGE_VAR
+from django.utils import formats
+from django.utils.text import capfirst
+from django.utils.translation import gettext_lazy as _
+
+from formula.paginator import CURSOR_VAR
+from formula.sidebar import render_sidebar
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def sidebar_navigation(context):
+    return render_sidebar(context)
+
+
+@register.simple_tag
+def keyset_paginator_url(cl, cursor):
+    return cl.get_query_string({CURSOR_VAR: cursor}, [PAGE_VAR])
+
+
+@register.inclusion_tag("formula/helpers/date_hierarchy.html")
+def calendar_date_hierarchy(cl):
+    """
+    Date hierarchy drilled down in the CalendarIndex of the field, with number of
+    rows next to every year, month and day. The index counts the whole table, so
+    searched or filtered changelists fall back to queries of the date hierarchy.
+    """
+    # Filters import unfold admin, which loads template libraries on import
+    from formula.filters import get_calendar_index
+
+    field_name = cl.date_hierarchy
+    index = get_calendar_index(cl.model, field_name) if field_name else None
+    year_field = f"{field_name}__year"
+    month_field = f"{field_name}__month"
+    day_field = f"{field_name}__day"
+    lookups = (year_field, month_field, day_field)
+    params = cl.get_filters_params()
+
+    if index is None or cl.query or any(param not in lookups for param in params):
+        return date_hierarchy(cl)
+
+    year_lookup = cl.params.get(year_field)
+    month_lookup = cl.params.get(month_field)
+    day_lookup = cl.params.get(day_field)
+
+    def link(filters):
+        return cl.get_query_string(filters, [f"{field_name}__"])
+
+    if not (year_lookup or month_lookup or day_lookup):
+        # Select appropriate start level, same as the date hierarchy does
+        years = index.get_years()
+
+        if len(years) == 1:
+            year_lookup = years[0][0]
+            months = index.get_months(year_lookup)
+
+            if len(months) == 1:
+                month_lookup = months[0][0]
+
+    if year_lookup and month_lookup and day_lookup:
+        day = datetime.date(int(year_lookup), int(month_lookup), int(day_lookup))
+
+        return {
+            "show": True,
+            "back": {
+                "link": link({year_field: year_lookup, month_field: month_lookup}),
+                "title": capfirst(formats.date_format(day, "YEAR_MONTH_FORMAT")),
+            },
+            "choices": [
+                {"title": capfirst(formats.date_format(day, "MONTH_DAY_FORMAT"))}
+            ],
+        }
+
+    if year_lookup and month_lookup:
+        year, month = int(year_lookup), int(month_lookup)
+
+        return {
+            "show": True,
+            "back": {"link": link({year_field: year}), "title": str(year)},
+            "choices": [
+                {
+                    "link": link(
+                        {year_field: year, month_field: month, day_field: day}
+                    ),
+                    "title": capfirst(
+                        formats.date_format(
+                            datetime.date(year, month, day), "MONTH_DAY_FORMAT"
+                        )
+                    ),
+                    "count": count,
+                }
+                for day, count in index.get_days(year, month)
+            ],
+        }
+
+    if year_lookup:
+        year = int(year_lookup)
+
+        return {
+            "show": True,
+            "back": {"link": link({}), "title": _("All dates")},
+            "choices": [
+                {
+                    "link": link({year_field: year, month_field: month}),
+                    "title": capfirst(
+                        formats.date_format(
+                            datetime.date(year, month, 1), "YEAR_MONTH_FORMAT"
+                        )
+                    ),
+                    "count": count,
+                }
+                for month, count in index.get_months(year)
+            ],
+        }
+
+    return {
+        "show": True,
+        "back": None,
+        "choices": [
+            {"link": link({year_field: year}), "title": str(year), "count": count}
+            for year, count in index.get_years()
+        ],
+    }
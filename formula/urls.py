@@ -3,8 +3,21 @@ from django.conf.urls.i18n import i18n_patterns
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
+from django.views.decorators.cache import never_cache
 
-from formula.views import HomeView
+from formula.views import AutocompleteView, CachedAutocompleteView, HomeView
+
+# Under WSGI every async view runs in its own event loop, the synchronous
+# autocomplete view serves the same cached results there
+autocomplete_view = AutocompleteView if settings.ASGI else CachedAutocompleteView
+
+admin_patterns = [
+    path(
+        "admin/autocomplete/",
+        never_cache(autocomplete_view.as_view(admin_site=admin.site)),
+    ),
+    path("admin/", admin.site.urls),
+]
 
 urlpatterns = (
     [
@@ -12,8 +25,6 @@ urlpatterns = (
         path("i18n/", include("django.conf.urls.i18n")),
         path("__debug__/", include("debug_toolbar.urls")),
     ]
-    + i18n_patterns(
-        path("admin/", admin.site.urls),
-    )
+    + i18n_patterns(*admin_patterns)
     + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 )
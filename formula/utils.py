@@ -1,9 +1,11 @@
-import random
-
 from django.conf import settings
-from django.urls import reverse_lazy
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from formula.badges import CountBadge
+from formula.models import Race
+from formula.navigation import ActiveRule
+
 
 def environment_callback(request):
     if settings.DEBUG:
@@ -12,53 +14,33 @@ def environment_callback(request):
     return [_("Production"), "primary"]
 
 
-def badge_callback(request):
-    return f"{random.randint(1, 9)}"
+upcoming_races_badge_callback = CountBadge(
+    lambda request: Race.objects.filter(date__gte=timezone.localdate())
+)
 
 
 def permission_callback(request):
     return True
 
 
-def driver_link_callback(request):
-    if (
-        reverse_lazy("admin:formula_driver_changelist") in request.path
-        or request.path == reverse_lazy("admin:formula_driverwithfilters_changelist")
-        or request.path == reverse_lazy("admin:crispy_form")
-        or request.path == reverse_lazy("admin:crispy_formset")
-    ):
-        return True
-
-    return False
-
-
-def driver_list_link_callback(request):
-    if request.path == reverse_lazy("admin:formula_driver_changelist"):
-        return True
-
-    if str(reverse_lazy("admin:formula_driver_changelist")) in request.path:
-        return True
-
-    if str(reverse_lazy("admin:formula_driverwithfilters_changelist")) in request.path:
-        return True
-
-    return False
-
-
-def driver_list_sublink_callback(request):
-    if str(reverse_lazy("admin:crispy_form")) in request.path:
-        return False
-
-    if str(reverse_lazy("admin:crispy_formset")) in request.path:
-        return False
-
-    if request.path == reverse_lazy("admin:formula_driver_changelist"):
-        return True
-
-    if str(reverse_lazy("admin:formula_driver_changelist")) in request.path:
-        return True
-
-    return False
+driver_link_callback = ActiveRule(
+    "admin:formula_driver_changelist",
+    exact=[
+        "admin:formula_driverwithfilters_changelist",
+        "admin:crispy_form",
+        "admin:crispy_formset",
+    ],
+)
+
+driver_list_link_callback = ActiveRule(
+    "admin:formula_driver_changelist",
+    "admin:formula_driverwithfilters_changelist",
+)
+
+driver_list_sublink_callback = ActiveRule(
+    "admin:formula_driver_changelist",
+    exclude=["admin:crispy_form", "admin:crispy_formset"],
+)
 
 
 def search_models_callback(request):
@@ -1,10 +1,25 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
+from django.contrib.admin.views.autocomplete import AutocompleteJsonView
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
 from django.forms import modelformset_factory
+from django.http import Http404, JsonResponse
 from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
-from django.views.generic import FormView, RedirectView
+from django.views.generic import FormView, RedirectView, TemplateView
 from unfold.views import UnfoldModelAdminViewMixin
 
+from formula.autocomplete import (
+    AUTOCOMPLETE_TIMEOUT,
+    get_autocomplete_keys,
+    get_cached_results,
+    get_search_index,
+    get_search_paths,
+    get_select_related,
+)
+from formula.cache import get_models_version
 from formula.forms import (
     CustomForm,
     CustomHorizontalForm,
@@ -13,6 +28,7 @@ from formula.forms import (
     DriverFormSet,
 )
 from formula.models import Driver
+from formula.profiling import get_profiles
 
 
 class HomeView(RedirectView):
@@ -83,6 +99,192 @@ class CrispyFormsetView(UnfoldModelAdminViewMixin, FormView):
         return context
 
 
+class ProfilingView(UnfoldModelAdminViewMixin, TemplateView):
+    title = _("Profiling")  # required: custom page header title
+    permission_required = ()
+    template_name = "formula/profiling.html"
+
+    def has_permission(self):
+        return self.request.user.is_superuser
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(
+            {
+                "sample_rate": settings.PROFILING_SAMPLE_RATE,
+                "table": {
+                    "headers": [
+                        _("View"),
+                        _("Requests"),
+                        _("Time (ms)"),
+                        _("Queries"),
+                        _("Max queries"),
+                        _("Duplicates"),
+                        _("SQL (ms)"),
+                        _("Render (ms)"),
+                        _("Slowest callbacks (ms)"),
+                    ],
+                    "rows": [
+                        [
+                            profile["view"],
+                            profile["requests"],
+                            f"{profile['time']:.1f}",
+                            f"{profile['queries']:.1f}",
+                            profile["max_queries"],
+                            f"{profile['duplicates']:.1f}",
+                            f"{profile['sql_time']:.1f}",
+                            f"{profile['render_time']:.1f}",
+                            ", ".join(
+                                f"{name} {duration:.1f}"
+                                for name, duration in profile["callbacks"]
+                            ),
+                        ]
+                        for profile in get_profiles()
+                    ],
+                },
+            }
+        )
+        return context
+
+
+class CachedAutocompleteView(AutocompleteJsonView):
+    """
+    Admin autocomplete endpoint caching first pages of results per term until one
+    of the searched models changes. Instead of counting all matches, one extra
+    row tells whether there is another page.
+    """
+
+    def get(self, request, *args, **kwargs):
+        to_field_name = self.prepare(request)
+        page = self.get_page_number(request)
+
+        if page > 1 or self.search_paths is None:
+            entry = self.search(page, to_field_name)
+        else:
+            entries = cache.get_many(self.cache_keys)
+            entry = get_cached_results(entries, self.cache_keys, self.term)
+
+            if entry is None:
+                entry = self.search(page, to_field_name)
+
+            if self.cache_keys[0] not in entries:
+                cache.set(self.cache_keys[0], entry, AUTOCOMPLETE_TIMEOUT)
+
+        return self.render_entry(entry)
+
+    def search(self, page, to_field_name):
+        offset = (page - 1) * self.paginate_by
+        objects = list(self.object_list[offset : offset + self.paginate_by + 1])
+        return self.serialize_entry(objects, to_field_name, page)
+
+    def prepare(self, request):
+        # Replaces admin_view() protection of the original admin site view
+        if not self.admin_site.has_permission(request):
+            raise PermissionDenied
+
+        (
+            self.term,
+            self.model_admin,
+            self.source_field,
+            to_field_name,
+        ) = self.process_request(request)
+
+        if not self.has_perm(request):
+            raise PermissionDenied
+
+        self.object_list = self.get_queryset()
+
+        if not self.object_list.ordered:
+            self.object_list = self.object_list.order_by("pk")
+
+        search = get_search_paths(
+            self.model_admin.model, self.model_admin.get_search_fields(request)
+        )
+        self.search_paths = None
+        self.search_index = get_search_index(self.model_admin)
+
+        if search is not None:
+            self.search_paths, models = search
+            self.object_list = self.object_list.select_related(
+                *get_select_related(self.search_paths)
+            )
+            self.cache_keys = get_autocomplete_keys(
+                get_models_version(models), request, self.term
+            )
+
+        return to_field_name
+
+    def get_page_number(self, request):
+        try:
+            page = int(request.GET.get("page", 1))
+        except ValueError as e:
+            raise Http404 from e
+
+        if page < 1:
+            raise Http404
+
+        return page
+
+    def serialize_entry(self, objects, to_field_name, page):
+        # String representation of some models follows foreign keys
+        more = len(objects) > self.paginate_by
+        objects = objects[: self.paginate_by]
+        complete = page == 1 and not more and self.search_paths is not None
+
+        return {
+            "results": [self.serialize_result(obj, to_field_name) for obj in objects],
+            # Search index documents of complete results filter results of longer
+            # terms
+            "haystacks": [self.search_index.get_document(obj) for obj in objects]
+            if complete and self.search_index is not None
+            else None,
+            "more": more,
+        }
+
+    def render_entry(self, entry):
+        return JsonResponse(
+            {
+                "results": entry["results"],
+                "pagination": {"more": entry["more"]},
+            }
+        )
+
+
+class AutocompleteView(CachedAutocompleteView):
+    """
+    Async variant of CachedAutocompleteView. Model admin lookup, permission checks
+    and search may query the database and run in a thread, results are fetched
+    through the async ORM.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        to_field_name = await sync_to_async(self.prepare)(request)
+        page = self.get_page_number(request)
+
+        if page > 1 or self.search_paths is None:
+            entry = await self.search(page, to_field_name)
+        else:
+            entries = await cache.aget_many(self.cache_keys)
+            entry = get_cached_results(entries, self.cache_keys, self.term)
+
+            if entry is None:
+                entry = await self.search(page, to_field_name)
+
+            if self.cache_keys[0] not in entries:
+                await cache.aset(self.cache_keys[0], entry, AUTOCOMPLETE_TIMEOUT)
+
+        return self.render_entry(entry)
+
+    async def search(self, page, to_field_name):
+        offset = (page - 1) * self.paginate_by
+        objects = [
+            obj
+            async for obj in self.object_list[offset : offset + self.paginate_by + 1]
+        ]
+
+        return await sync_to_async(self.serialize_entry)(objects, to_field_name, page)
+
+
 def dashboard_callback(request, context):
     """
     Here you can pass additional variables to the dashboard
@@ -0,0 +1,12 @@
+from os import environ
+
+bind = ":8000"
+
+workers = 2
+
+# ASGI mode serves async views (e.g. autocomplete) without blocking the worker
+if environ.get("ASGI") == "1":
+    wsgi_app = "formula.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "formula.wsgi:application"